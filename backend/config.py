@@ -6,51 +6,72 @@ Text-Optimized version using FastEmbed
 
 import os
 from typing import Optional
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+import msgspec
 from dotenv import load_dotenv
 
 # Force override system environment variables with .env values
 load_dotenv(override=True)
 
 
-class Settings(BaseSettings):
+class Settings(msgspec.Struct, frozen=True, kw_only=True):
     """Application settings loaded from environment variables"""
     
     # Pinecone Configuration
     pinecone_api_key: str
     pinecone_environment: str = "us-east-1"
     pinecone_index_name: str = "nexus-text"
+    # Check for (and create) the index at startup; disable when it's provisioned separately
+    pinecone_ensure_index: bool = True
     
     # Google Gemini Configuration
     #load from .env or environment variable
-    google_api_key: str=os.getenv("GOOGLE_API_KEY")
+    google_api_key: Optional[str] = None
     
     # Application Settings
     upload_dir: str = "./uploads"
     max_file_size_mb: int = 50
-    allowed_extensions: list = [".pdf"]
+    allowed_extensions: list = msgspec.field(default_factory=lambda: [".pdf"])
     
-    # Text Chunking Settings
-    chunk_size: int = 512  # Characters per chunk
-    chunk_overlap: int = 100  # Overlap between chunks
+    # Processing Status Tracking (in-memory when redis_url is unset)
+    redis_url: Optional[str] = None
+    status_ttl_seconds: int = 3600
+    
+    # Text Chunking Settings (measured in embedding model tokens)
+    chunk_size: int = 256  # Tokens per chunk
+    chunk_overlap: int = 64  # Tokens shared by consecutive chunks
     
     # Vector Settings (FastEmbed BAAI/bge-small-en-v1.5 dimension)
     embedding_dimension: int = 384
     embedding_model: str = "BAAI/bge-small-en-v1.5"
+    embedding_batch_size: int = 32  # Rows per ONNX Runtime inference call
+    embedding_max_length: int = 512  # Max tokens per text (BGE context size)
+    # Dynamically quantize fp32 ONNX weights to int8 on first load (cached beside the model)
+    embedding_quantize: bool = False
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build settings from environment variables
+        Field names match env vars case-insensitively; list fields are JSON-encoded
+        """
+        env = {key.lower(): value for key, value in os.environ.items()}
+        values = {}
+        for field in msgspec.structs.fields(cls):
+            if field.name not in env:
+                continue
+            value = env[field.name]
+            if field.type is list:
+                value = msgspec.json.decode(value)
+            values[field.name] = value
+        # Non-strict conversion parses numeric/boolean strings into their field types
+        return msgspec.convert(values, cls, strict=False)
 
 
-@lru_cache()
-def get_settings() -> Settings:
-    """Get cached settings instance"""
-    return Settings()
+# Module-level singleton: env vars are parsed once at import
+settings: Settings = Settings.from_env()
 
 
-# Create uploads directory if it doesn't exist
-settings = get_settings()
-os.makedirs(settings.upload_dir, exist_ok=True)
+def get_settings() -> Settings:
+    """Get the settings singleton (kept for backwards compatibility)"""
+    return settings
+
@@ -3,15 +3,21 @@ Nexus - Multimodal RAG Pipeline Backend
 FastAPI application with modular architecture
 """
 
+import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import ORJSONResponse
 
-from config import get_settings
+from config import settings
 from routes import documents_router, chat_router
 from services.vector_store import vector_store
+from services.embedding_service import embedding_service
+from services.status_store import status_store
+from services.rag_service import rag_service
+from services.pdf_service import pdf_service
 
 # Configure logging
 logging.basicConfig(
@@ -20,8 +26,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,6 +34,31 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Nexus RAG Pipeline...")
     logger.info(f"Upload directory: {settings.upload_dir}")
     
+    # Warm the embedding model so the first upload/chat doesn't pay for model init
+    try:
+        await embedding_service.warm_up()
+    except Exception as e:
+        logger.warning(f"Could not load embedding model on startup: {e}")
+    
+    # Connect processing status store (Redis if configured)
+    try:
+        await status_store.connect()
+    except Exception as e:
+        logger.warning(f"Could not connect to Redis, tracking status in memory: {e}")
+    
+    try:
+        # Open Gemini's pooled TLS connection now rather than on the first chat request
+        await rag_service.warm_up()
+    except Exception as e:
+        logger.warning(f"Could not pre-connect to Gemini: {e}")
+    
+    # Make sure the Pinecone index exists before any request needs it
+    if settings.pinecone_ensure_index:
+        try:
+            await asyncio.to_thread(vector_store.ensure_index)
+        except Exception as e:
+            logger.warning(f"Could not verify Pinecone index on startup: {e}")
+    
     # Initialize vector store connection
     try:
         stats = await vector_store.get_index_stats()
@@ -41,12 +70,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Nexus RAG Pipeline...")
+    await status_store.close()
+    await rag_service.aclose()
+    pdf_service.shutdown()
+    vector_store.shutdown()
+    embedding_service.shutdown()
 
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="Nexus - Multimodal RAG Pipeline",
-    description="""
+APP_DESCRIPTION = """
     A multimodal RAG (Retrieval-Augmented Generation) system for PDF document analysis.
     
     ## Features
@@ -61,34 +92,9 @@ app = FastAPI(
     2. Convert pages to images → Embed with Voyage AI
     3. Store vectors in Pinecone with metadata
     4. Query → Retrieve similar pages → Render JIT → Gemini reasoning
-    """,
-    version="2.0.0",
-    lifespan=lifespan
-)
-
-# CORS middleware for frontend integration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173", 
-        "http://localhost:3000", 
-        "http://127.0.0.1:5173", 
-        "http://localhost:8080", 
-        "http://127.0.0.1:8080",
-        "http://localhost:8081",
-        "http://127.0.0.1:8081",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(documents_router)
-app.include_router(chat_router)
+    """
 
 
-@app.get("/")
 async def root():
     """Health check endpoint"""
     return {
@@ -98,7 +104,6 @@ async def root():
     }
 
 
-@app.get("/health")
 async def health_check():
     """Detailed health check"""
     try:
@@ -120,11 +125,56 @@ async def health_check():
     }
 
 
-if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application
+    Only the app itself and the upload directory are set up here; importing this
+    module still imports the routes, which construct the service singletons
+    (so settings such as PINECONE_API_KEY and GOOGLE_API_KEY must be present)
+    """
+    # Create uploads directory if it doesn't exist
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    
+    # Initialize FastAPI app
+    app = FastAPI(
+        title="Nexus - Multimodal RAG Pipeline",
+        description=APP_DESCRIPTION,
+        version="2.0.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse
+    )
+    
+    # CORS middleware for frontend integration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:5173", 
+            "http://localhost:3000", 
+            "http://127.0.0.1:5173", 
+            "http://localhost:8080", 
+            "http://127.0.0.1:8080",
+            "http://localhost:8081",
+            "http://127.0.0.1:8081",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
     )
+    
+    # Include routers
+    app.include_router(documents_router)
+    app.include_router(chat_router)
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    
+    return app
+
+
+def __getattr__(name: str):
+    """Build the app on first access to main.app (e.g. `uvicorn main:app`)"""
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
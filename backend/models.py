@@ -4,7 +4,7 @@ Text-optimized RAG pipeline models
 """
 
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from enum import Enum
 
@@ -33,8 +33,15 @@ class DeleteDocumentRequest(BaseModel):
 
 
 # Response Models
+# Response models are immutable; ProcessingStatus stays mutable because
+# document processing updates it in place
+RESPONSE_MODEL_CONFIG = ConfigDict(frozen=True, extra="forbid", validate_assignment=False)
+
+
 class SourceChunk(BaseModel):
     """Source chunk information in chat response"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     doc_id: str
     doc_name: str
     page_num: int
@@ -45,6 +52,8 @@ class SourceChunk(BaseModel):
 
 class ChatResponse(BaseModel):
     """Response model for chat endpoint"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     answer: str
     sources: List[SourceChunk]
     query: str
@@ -52,6 +61,8 @@ class ChatResponse(BaseModel):
 
 class DocumentInfo(BaseModel):
     """Document information model"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     id: str
     name: str
     size: str
@@ -63,12 +74,16 @@ class DocumentInfo(BaseModel):
 
 class DocumentListResponse(BaseModel):
     """Response model for listing documents"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     documents: List[DocumentInfo]
     total: int
 
 
 class UploadResponse(BaseModel):
     """Response model for file upload"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     doc_id: str
     name: str
     status: DocumentStatus
@@ -87,6 +102,8 @@ class ProcessingStatus(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response"""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     status: str
     version: str
     services: Dict[str, bool]
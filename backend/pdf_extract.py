@@ -0,0 +1,18 @@
+"""
+PDF Page Text Extraction
+Runs in PDFService's worker processes; imports only PyMuPDF so the workers
+don't load the services package (Pinecone client, Gemini, ONNX Runtime)
+"""
+
+from typing import List
+import fitz  # PyMuPDF
+
+# Plain-text extraction without dehyphenation: chunking and embedding don't need
+# words rejoined across line breaks, so skip that post-processing pass
+TEXT_EXTRACT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_DEHYPHENATE
+
+
+def extract_page_texts(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract text for pages [start, stop) of a PDF"""
+    with fitz.open(pdf_path) as doc:
+        return [doc[i].get_text("text", flags=TEXT_EXTRACT_FLAGS) for i in range(start, stop)]
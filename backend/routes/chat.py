@@ -7,8 +7,9 @@ Text-optimized pipeline using FastEmbed
 import logging
 from typing import Optional, List
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 
-from models import ChatRequest, ChatResponse, SourceChunk
+from models import ChatRequest, ChatResponse
 from services.rag_service import rag_service
 from services.pdf_service import pdf_service
 
@@ -16,7 +17,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
-@router.post("/", response_model=ChatResponse)
+@router.post("/", response_model=None, responses={200: {"model": ChatResponse}})
 async def chat_with_documents(request: ChatRequest):
     """
     Chat with uploaded documents using RAG
@@ -25,6 +26,9 @@ async def chat_with_documents(request: ChatRequest):
     1. Query embedded using FastEmbed
     2. Similar text chunks retrieved from Pinecone
     3. Gemini generates answer with text context
+    
+    The response dict is serialized directly with no Pydantic pass
+    (ChatResponse is only used for the OpenAPI schema)
     """
     try:
         logger.info(f"Chat request: {request.query[:50]}...")
@@ -36,24 +40,24 @@ async def chat_with_documents(request: ChatRequest):
             doc_ids=request.doc_ids
         )
         
-        # Format sources for response
-        sources = [
-            SourceChunk(
-                doc_id=s["doc_id"],
-                doc_name=s["doc_name"],
-                page_num=s["page_num"],
-                chunk_index=s.get("chunk_index", 0),
-                chunk_text=s.get("chunk_text", ""),
-                similarity_score=s["similarity_score"]
-            )
-            for s in result["sources"]
-        ]
+        # Project sources onto the SourceChunk fields as plain dicts
+        payload = {
+            "answer": result["answer"],
+            "query": result["query"],
+            "sources": [
+                {
+                    "doc_id": s["doc_id"],
+                    "doc_name": s["doc_name"],
+                    "page_num": s["page_num"],
+                    "chunk_index": s.get("chunk_index", 0),
+                    "chunk_text": s.get("chunk_text", ""),
+                    "similarity_score": s["similarity_score"]
+                }
+                for s in result["sources"]
+            ]
+        }
         
-        return ChatResponse(
-            answer=result["answer"],
-            sources=sources,
-            query=result["query"]
-        )
+        return ORJSONResponse(content=payload)
         
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
@@ -8,26 +8,51 @@ import os
 import uuid
 import asyncio
 import logging
-from typing import Dict
+from functools import lru_cache
+from itertools import islice
+from typing import List, Optional, Tuple
 from datetime import datetime
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+import numpy as np
+import orjson
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request
+from fastapi.responses import Response
 
 from models import (
-    DocumentStatus, DocumentInfo, DocumentListResponse, 
+    DocumentStatus, DocumentListResponse, 
     UploadResponse, ProcessingStatus, DeleteDocumentRequest
 )
-from services.pdf_service import pdf_service
+from services.pdf_service import pdf_service, FileTooLargeError
 from services.embedding_service import embedding_service
 from services.vector_store import vector_store
-from config import get_settings
+from services.status_store import status_store
+from services.rag_service import rag_service
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-# In-memory status tracking (use Redis in production)
-processing_status: Dict[str, ProcessingStatus] = {}
+# Chunks embedded and upserted per round while indexing a document
+INDEX_BATCH_SIZE = 256
+
+# Document listing cache, rebuilt only after an upload or delete
+# _documents_list_cache holds JSON-ready document dicts (status READY) along with the
+# pdf_service listing they were built from, which is a new object whenever the upload
+# directory changes (including uploads/deletes by other workers);
+# _documents_list_bytes memoizes the serialized response for one status overlay
+_documents_list_cache: Optional[Tuple[List[dict], List[dict]]] = None
+_documents_list_bytes: Optional[Tuple[tuple, bytes]] = None
+
+
+@lru_cache(maxsize=4096)
+def _ts_to_dt(ts: float) -> datetime:
+    """Convert a file timestamp to datetime (file times rarely change, so memoize)"""
+    return datetime.fromtimestamp(ts)
+
+
+def _invalidate_documents_list() -> None:
+    """Drop the cached document listing"""
+    global _documents_list_cache, _documents_list_bytes
+    _documents_list_cache = None
+    _documents_list_bytes = None
 
 
 @router.post("/upload", response_model=UploadResponse)
@@ -52,38 +77,33 @@ async def upload_document(
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
         
-        # Check file size
-        content = await file.read()
-        file_size = len(content)
-        max_size = settings.max_file_size_mb * 1024 * 1024
-        
-        if file_size > max_size:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File too large. Maximum size is {settings.max_file_size_mb}MB"
-            )
-        
         # Generate unique document ID
         doc_id = str(uuid.uuid4())
         
         # Initialize processing status
-        processing_status[doc_id] = ProcessingStatus(
+        status = ProcessingStatus(
             doc_id=doc_id,
             status=DocumentStatus.UPLOADING,
             progress=0,
             message="Starting upload..."
         )
+        await status_store.set(status)
         
-        # Save the PDF
-        pdf_path, page_count = await pdf_service.save_pdf(doc_id, content, file.filename)
+        # Stream the PDF to disk (size is enforced while streaming)
+        try:
+            pdf_path, page_count = await pdf_service.save_pdf(doc_id, file, file.filename)
+        except FileTooLargeError as e:
+            await status_store.delete(doc_id)
+            raise HTTPException(status_code=413, detail=str(e))
+        _invalidate_documents_list()
         
         # Update status
-        processing_status[doc_id] = ProcessingStatus(
-            doc_id=doc_id,
-            status=DocumentStatus.PROCESSING,
-            progress=10,
-            total_pages=page_count,
-            message=f"PDF saved. Extracting text from {page_count} pages..."
+        status.total_pages = page_count
+        await status_store.update(
+            status,
+            DocumentStatus.PROCESSING,
+            10,
+            f"PDF saved. Extracting text from {page_count} pages..."
         )
         
         # Start background processing
@@ -115,111 +135,104 @@ async def process_document(doc_id: str, doc_name: str, page_count: int):
     2. Chunk text with overlap
     3. Embed chunks using FastEmbed
     4. Store in Pinecone
+    Steps 2-4 run a batch at a time as chunks are produced
     """
-    try:
-        logger.info(f"Starting processing for document {doc_id}: {doc_name}")
-        
-        # Step 1: Extract and chunk text
-        processing_status[doc_id] = ProcessingStatus(
+    status = await status_store.get(doc_id)
+    if status is None:
+        status = ProcessingStatus(
             doc_id=doc_id,
             status=DocumentStatus.PROCESSING,
-            progress=20,
+            progress=10,
             total_pages=page_count,
-            message="Extracting text from PDF..."
+            message="Queued for processing..."
         )
+        await status_store.set(status)
+    
+    try:
+        logger.info(f"Starting processing for document {doc_id}: {doc_name}")
         
-        chunks = await pdf_service.extract_and_chunk(doc_id)
-        
-        if not chunks:
-            processing_status[doc_id] = ProcessingStatus(
-                doc_id=doc_id,
-                status=DocumentStatus.FAILED,
-                progress=0,
-                message="Failed to extract text from PDF"
-            )
-            return
-        
-        logger.info(f"Extracted {len(chunks)} chunks from {doc_name}")
-        
-        # Step 2: Embed chunks
-        processing_status[doc_id] = ProcessingStatus(
-            doc_id=doc_id,
-            status=DocumentStatus.EMBEDDING,
-            progress=40,
-            total_pages=page_count,
-            message=f"Embedding {len(chunks)} text chunks..."
+        # Step 1: Extract text; chunks are produced lazily as batches are consumed
+        await status_store.update(
+            status, DocumentStatus.PROCESSING, 20, "Extracting text from PDF..."
         )
         
-        # Get all chunk texts for batch embedding
-        chunk_texts = [chunk.text for chunk in chunks]
+        chunk_iter = await pdf_service.extract_and_chunk(doc_id, stream=True)
+        indexed = 0
         
-        try:
-            embeddings = await embedding_service.embed_texts_batch(chunk_texts)
-        except Exception as e:
-            logger.error(f"Error embedding chunks: {str(e)}")
-            processing_status[doc_id] = ProcessingStatus(
-                doc_id=doc_id,
-                status=DocumentStatus.FAILED,
-                progress=0,
-                message=f"Failed to generate embeddings: {str(e)}"
+        # Steps 2-3: Embed and store one batch of chunks at a time, so memory
+        # stays bounded by the batch size rather than the document size.
+        # Producing a batch can tokenize the whole document, so it runs in a thread
+        while batch := await asyncio.to_thread(list, islice(chunk_iter, INDEX_BATCH_SIZE)):
+            chunk_texts = [chunk.text for chunk in batch]
+            
+            try:
+                embeddings = await embedding_service.embed_texts_batch(chunk_texts)
+            except Exception as e:
+                logger.error(f"Error embedding chunks: {str(e)}")
+                # Earlier batches may already be upserted
+                rag_service.clear_query_cache()
+                await status_store.update(
+                    status,
+                    DocumentStatus.FAILED,
+                    0,
+                    f"Failed to generate embeddings: {str(e)}"
+                )
+                return
+            
+            # Prepare chunk data for batch upsert as parallel arrays
+            chunk_indices = np.fromiter(
+                (chunk.chunk_index for chunk in batch), dtype=np.int32, count=len(batch)
+            )
+            page_nums = np.fromiter(
+                (chunk.page_num for chunk in batch), dtype=np.int32, count=len(batch)
+            )
+            
+            await vector_store.upsert_chunk_vectors_batch(
+                doc_id, doc_name, chunk_indices, chunk_texts, page_nums, embeddings
+            )
+            indexed += len(batch)
+            
+            # Total chunk count isn't known up front; estimate progress by page reached
+            await status_store.update(
+                status,
+                DocumentStatus.EMBEDDING,
+                40 + 55 * min(int(page_nums[-1]), page_count) // max(page_count, 1),
+                f"Embedded and stored {indexed} text chunks..."
             )
-            return
-        
-        # Update progress
-        processing_status[doc_id] = ProcessingStatus(
-            doc_id=doc_id,
-            status=DocumentStatus.EMBEDDING,
-            progress=70,
-            total_pages=page_count,
-            message="Embeddings generated. Storing in database..."
-        )
-        
-        # Step 3: Prepare chunk data for batch upsert
-        chunk_data = []
-        for chunk, embedding in zip(chunks, embeddings):
-            chunk_data.append((
-                chunk.chunk_index,
-                chunk.text,
-                chunk.page_num,
-                embedding
-            ))
         
-        # Step 4: Store in Pinecone
-        processing_status[doc_id] = ProcessingStatus(
-            doc_id=doc_id,
-            status=DocumentStatus.INDEXED,
-            progress=85,
-            total_pages=page_count,
-            message="Storing vectors in database..."
-        )
+        if not indexed:
+            await status_store.update(
+                status, DocumentStatus.FAILED, 0, "Failed to extract text from PDF"
+            )
+            return
         
-        await vector_store.upsert_chunk_vectors_batch(doc_id, doc_name, chunk_data)
+        # Cached answers predate this document
+        rag_service.clear_query_cache()
         
         # Mark as ready
-        processing_status[doc_id] = ProcessingStatus(
-            doc_id=doc_id,
-            status=DocumentStatus.READY,
-            progress=100,
-            total_pages=page_count,
-            message=f"Successfully indexed {len(chunks)} text chunks!"
+        await status_store.update(
+            status,
+            DocumentStatus.READY,
+            100,
+            f"Successfully indexed {indexed} text chunks!"
         )
         
-        logger.info(f"Successfully processed document {doc_id}: {len(chunks)} chunks indexed")
+        logger.info(f"Successfully processed document {doc_id}: {indexed} chunks indexed")
         
     except Exception as e:
         logger.error(f"Processing error for {doc_id}: {str(e)}")
-        processing_status[doc_id] = ProcessingStatus(
-            doc_id=doc_id,
-            status=DocumentStatus.FAILED,
-            progress=0,
-            message=f"Processing failed: {str(e)}"
+        # Some chunks may have been upserted before the failure
+        rag_service.clear_query_cache()
+        await status_store.update(
+            status, DocumentStatus.FAILED, 0, f"Processing failed: {str(e)}"
         )
 
 
 @router.get("/status/{doc_id}", response_model=ProcessingStatus)
 async def get_processing_status(doc_id: str):
     """Get the processing status of a document"""
-    if doc_id not in processing_status:
+    status = await status_store.get(doc_id)
+    if status is None:
         # Check if document exists and is ready
         metadata = pdf_service.get_document_metadata(doc_id)
         if metadata:
@@ -232,35 +245,50 @@ async def get_processing_status(doc_id: str):
             )
         raise HTTPException(status_code=404, detail="Document not found")
     
-    return processing_status[doc_id]
+    return status
 
 
-@router.get("/", response_model=DocumentListResponse)
+@router.get("/", response_model=None, responses={200: {"model": DocumentListResponse}})
 async def list_documents():
-    """List all uploaded documents"""
+    """
+    List all uploaded documents
+    The listing is cached until the upload directory changes; in-flight
+    processing statuses are overlaid on each request
+    """
+    global _documents_list_cache, _documents_list_bytes
+    
     try:
-        docs = pdf_service.list_documents()
-        
-        documents = []
-        for doc in docs:
-            # Get status
-            status = DocumentStatus.READY
-            if doc["id"] in processing_status:
-                status = processing_status[doc["id"]].status
-            
-            documents.append(DocumentInfo(
-                id=doc["id"],
-                name=doc["name"],
-                size=doc["size"],
-                pages=doc["pages"],
-                status=status,
-                created_at=datetime.fromtimestamp(doc["created_at"])
-            ))
+        listing = pdf_service.list_documents()
+        if _documents_list_cache is None or _documents_list_cache[0] is not listing:
+            _documents_list_cache = (listing, [
+                {
+                    "id": doc["id"],
+                    "name": doc["name"],
+                    "size": doc["size"],
+                    "pages": doc["pages"],
+                    "status": DocumentStatus.READY,
+                    "created_at": _ts_to_dt(doc["created_at"])
+                }
+                for doc in listing
+            ])
+            _documents_list_bytes = None
+        documents_cache = _documents_list_cache[1]
+        
+        # Status overlay from the status store; serialized bytes are reused
+        # until the listing or any overlaid status changes
+        statuses = await status_store.get_states([doc["id"] for doc in documents_cache])
+        overlay = tuple(statuses.items())
+        if _documents_list_bytes is None or _documents_list_bytes[0] != overlay:
+            documents = [
+                {**doc, "status": statuses[doc["id"]]} if doc["id"] in statuses else doc
+                for doc in documents_cache
+            ]
+            _documents_list_bytes = (
+                overlay,
+                orjson.dumps({"documents": documents, "total": len(documents)})
+            )
         
-        return DocumentListResponse(
-            documents=documents,
-            total=len(documents)
-        )
+        return Response(content=_documents_list_bytes[1], media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error listing documents: {str(e)}")
@@ -278,8 +306,9 @@ async def delete_document(doc_id: str):
         deleted = pdf_service.delete_document(doc_id)
         
         # Remove from status tracking
-        if doc_id in processing_status:
-            del processing_status[doc_id]
+        await status_store.delete(doc_id)
+        _invalidate_documents_list()
+        rag_service.clear_query_cache()
         
         if not deleted:
             raise HTTPException(status_code=404, detail="Document not found")
@@ -294,19 +323,31 @@ async def delete_document(doc_id: str):
 
 
 @router.get("/{doc_id}/page/{page_num}")
-async def get_page_image(doc_id: str, page_num: int):
-    """Get a specific page as base64 image"""
+async def get_page_image(doc_id: str, page_num: int, request: Request):
+    """
+    Get a specific page as a JPEG image
+    Pages of an uploaded document never change, so responses are marked
+    immutable and revalidations short-circuit to 304
+    """
     try:
-        base64_image = await pdf_service.render_page_to_base64(doc_id, page_num)
+        etag = f'"{doc_id}:{page_num}:jpeg"'
+        headers = {
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": etag
+        }
+        
+        if (
+            request.headers.get("if-none-match") == etag
+            and pdf_service.get_pdf_path(doc_id).exists()
+        ):
+            return Response(status_code=304, headers=headers)
         
-        if not base64_image:
+        image_bytes = await pdf_service.render_page_to_jpeg_bytes(doc_id, page_num)
+        
+        if not image_bytes:
             raise HTTPException(status_code=404, detail="Page not found")
         
-        return {
-            "doc_id": doc_id,
-            "page_num": page_num,
-            "image": f"data:image/png;base64,{base64_image}"
-        }
+        return Response(content=image_bytes, media_type="image/jpeg", headers=headers)
         
     except HTTPException:
         raise
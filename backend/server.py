@@ -0,0 +1,24 @@
+"""
+Development server entry point: `python server.py`
+Kept out of main.py because worker processes started by the app (PDF text
+extraction) re-import the __main__ script, and main.py imports the whole app
+"""
+
+import os
+import uvicorn
+
+
+if __name__ == "__main__":
+    # uvloop + httptools come with uvicorn[standard]; the reloader is opt-in (RELOAD=1)
+    # and takes precedence over WEB_CONCURRENCY workers
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=bool(int(os.getenv("RELOAD", "0"))),
+        log_level="info"
+    )
@@ -6,10 +6,12 @@ from .pdf_service import PDFService, pdf_service
 from .embedding_service import EmbeddingService, embedding_service
 from .vector_store import VectorStore, vector_store
 from .rag_service import RAGService, rag_service
+from .status_store import StatusStore, status_store
 
 __all__ = [
     "PDFService", "pdf_service",
     "EmbeddingService", "embedding_service",
     "VectorStore", "vector_store",
-    "RAGService", "rag_service"
+    "RAGService", "rag_service",
+    "StatusStore", "status_store"
 ]
\ No newline at end of file
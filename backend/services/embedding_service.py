@@ -3,14 +3,141 @@ Embedding Service using FastEmbed
 Fast, lightweight text embeddings for RAG pipeline
 """
 
+import os
+import asyncio
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import List, Optional
+import numpy as np
+from cachetools import LRUCache
+import onnxruntime as ort
+from tokenizers import Tokenizer
 from fastembed import TextEmbedding
+from fastembed.common.utils import define_cache_dir
+from huggingface_hub import snapshot_download
+from huggingface_hub.errors import LocalEntryNotFoundError
 
-from config import get_settings
+from config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Inference threads. Each run already uses every core (intra-op threads), so a
+# second worker only overlaps tokenization and buffer filling with inference;
+# every worker also keeps its own IO buffers (~25 MB at the default sizes)
+EMBEDDING_WORKERS = 2
+
+
+class OnnxEmbedder:
+    """
+    Persistent ONNX Runtime session for the embedding model
+    Reuses an IO binding and pre-allocated buffers across calls (one set per
+    thread, the session itself is shared), returning CLS-pooled,
+    L2-normalized float32 vectors
+    """
+
+    def __init__(
+        self,
+        model_path: Path,
+        tokenizer_path: Path,
+        batch_size: int,
+        max_length: int,
+        dimension: int
+    ):
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = os.cpu_count() or 1
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {inp.name for inp in self.session.get_inputs()}
+        self.output_name = self.session.get_outputs()[0].name
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.dimension = dimension
+        self._local = threading.local()
+
+    def _buffers(self) -> threading.local:
+        """Get this thread's IO binding and buffers, allocating on first use"""
+        local = self._local
+        if not hasattr(local, "binding"):
+            # Flat buffers sized for the largest batch; each run views an (n, l) prefix
+            size = self.batch_size * self.max_length
+            local.input_ids = np.zeros(size, dtype=np.int64)
+            local.attention_mask = np.zeros(size, dtype=np.int64)
+            local.token_type_ids = np.zeros(size, dtype=np.int64)
+            local.hidden = np.empty(size * self.dimension, dtype=np.float32)
+            local.binding = self.session.io_binding()
+        return local
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in fixed-size batches
+
+        Returns:
+            (len(texts), dimension) float32 array of unit-length vectors
+        """
+        buffers = self._buffers()
+        binding = buffers.binding
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            n, length = len(encodings), len(encodings[0].ids)
+
+            inputs = {
+                "input_ids": buffers.input_ids[:n * length].reshape(n, length),
+                "attention_mask": buffers.attention_mask[:n * length].reshape(n, length),
+                "token_type_ids": buffers.token_type_ids[:n * length].reshape(n, length),
+            }
+            inputs["input_ids"][:] = [enc.ids for enc in encodings]
+            inputs["attention_mask"][:] = [enc.attention_mask for enc in encodings]
+            inputs["token_type_ids"][:] = [enc.type_ids for enc in encodings]
+            hidden = buffers.hidden[:n * length * self.dimension].reshape(n, length, self.dimension)
+
+            binding.clear_binding_inputs()
+            binding.clear_binding_outputs()
+            for name, array in inputs.items():
+                if name in self.input_names:
+                    binding.bind_cpu_input(name, array)
+            binding.bind_output(
+                self.output_name, "cpu", 0, np.float32, hidden.shape, hidden.ctypes.data
+            )
+            self.session.run_with_iobinding(binding)
+
+            # CLS pooling
+            vectors[start:start + n] = hidden[:, 0]
+
+        np.divide(vectors, np.linalg.norm(vectors, axis=1, keepdims=True), out=vectors)
+        return vectors
+
+
+def quantize_model(model_path: Path) -> Path:
+    """
+    Dynamically quantize an ONNX model's weights to int8
+    The quantized copy is written next to the original and reused on later loads
+    
+    Returns:
+        Path to the int8 model
+    """
+    int8_path = model_path.with_name(f"{model_path.stem}_int8.onnx")
+    if not int8_path.exists():
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        
+        logger.info(f"Quantizing {model_path.name} to int8...")
+        quantize_dynamic(str(model_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
 
 
 class EmbeddingService:
@@ -18,79 +145,195 @@ class EmbeddingService:
     Text Embedding Service using FastEmbed
     Generates embeddings for text chunks and queries
     Uses BAAI/bge-small-en-v1.5 by default (384 dimensions, fast & efficient)
+    Model files come from FastEmbed's model registry and cache; inference runs on our own ONNX session
     """
-    
+
     def __init__(self):
         self.model_name = settings.embedding_model
-        self._model: Optional[TextEmbedding] = None
+        self._model: Optional[OnnxEmbedder] = None
+        self._model_dir: Optional[Path] = None
+        self._tokenizer: Optional[Tokenizer] = None
+        self._tokenizer_fingerprint: Optional[str] = None
+        # Query embeddings are deterministic for the model, so repeats are served from here
+        self._query_cache: LRUCache = LRUCache(maxsize=1024)
+        # Dedicated inference threads (created on first use), so per-thread buffers
+        # exist for a fixed number of threads rather than the whole default executor
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the inference thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=EMBEDDING_WORKERS, thread_name_prefix="embedding"
+            )
+        return self._executor
+    
+    def shutdown(self) -> None:
+        """Stop the inference threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def _get_model_dir(self) -> Path:
+        """
+        Resolve (downloading if not cached) the model's local directory
+        Fetches only the ONNX file and tokenizer from the model's Hugging Face
+        source, into FastEmbed's cache so its earlier downloads are reused
+        """
+        if self._model_dir is None:
+            description = next(
+                (
+                    model for model in TextEmbedding.list_supported_models()
+                    if model["model"].lower() == self.model_name.lower()
+                ),
+                None
+            )
+            repo_id = description and description["sources"].get("hf")
+            if not repo_id:
+                raise ValueError(f"No Hugging Face source for embedding model {self.model_name}")
+            
+            download = dict(
+                repo_id=repo_id,
+                cache_dir=str(define_cache_dir()),
+                allow_patterns=[
+                    description["model_file"], "tokenizer.json", *description["additional_files"]
+                ]
+            )
+            # Like FastEmbed, use a cached snapshot first so starting a process
+            # doesn't contact the Hub; download only if the model isn't there
+            model_dir = None
+            try:
+                model_dir = Path(snapshot_download(**download, local_files_only=True))
+            except LocalEntryNotFoundError:
+                pass
+            if model_dir is None or not (model_dir / description["model_file"]).exists():
+                model_dir = Path(snapshot_download(**download))
+            self._model_dir = model_dir
+        return self._model_dir
+
+    def get_tokenizer(self) -> Tokenizer:
+        """
+        Get the embedding model's tokenizer for measuring and splitting text
+        Unlike the inference tokenizer it neither truncates nor pads, so whole
+        documents can be tokenized at once
+        """
+        if self._tokenizer is None:
+            tokenizer = Tokenizer.from_file(str(next(self._get_model_dir().rglob("tokenizer.json"))))
+            tokenizer.no_truncation()
+            tokenizer.no_padding()
+            self._tokenizer = tokenizer
+        return self._tokenizer
+
+    def get_tokenizer_fingerprint(self) -> str:
+        """Hash of the tokenizer's full definition, for keying anything derived from its output"""
+        if self._tokenizer_fingerprint is None:
+            definition = self.get_tokenizer().to_str().encode()
+            self._tokenizer_fingerprint = hashlib.sha256(definition).hexdigest()
+        return self._tokenizer_fingerprint
     
-    def _get_model(self) -> TextEmbedding:
+    def _get_model(self) -> OnnxEmbedder:
         """Lazy load the embedding model"""
         if self._model is None:
             logger.info(f"Loading FastEmbed model: {self.model_name}")
-            self._model = TextEmbedding(model_name=self.model_name)
+            model_dir = self._get_model_dir()
+            model_path = next(
+                p for p in model_dir.rglob("*.onnx") if not p.stem.endswith("_int8")
+            )
+            if settings.embedding_quantize:
+                model_path = quantize_model(model_path)
+            
+            self._model = OnnxEmbedder(
+                model_path,
+                next(model_dir.rglob("tokenizer.json")),
+                batch_size=settings.embedding_batch_size,
+                max_length=settings.embedding_max_length,
+                dimension=settings.embedding_dimension
+            )
             logger.info("FastEmbed model loaded successfully")
         return self._model
+
+    async def warm_up(self) -> None:
+        """Load the model (and its ONNX session) ahead of the first request"""
+        await asyncio.to_thread(self._get_model)
     
-    async def embed_text(self, text: str) -> List[float]:
+    def _embed_sync(self, texts: List[str]) -> np.ndarray:
+        """Blocking embed of one mini-batch (runs in a worker thread)"""
+        return self._get_model().embed(texts)
+
+    async def _embed_in_thread(self, texts: List[str]) -> np.ndarray:
+        """Embed a mini-batch off the event loop on the inference threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._embed_sync, texts)
+
+    async def embed_text(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text string
-        
+
         Args:
             text: Text to embed
-        
+
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a (dimension,) float32 array
         """
         try:
-            model = self._get_model()
-            # FastEmbed returns a generator, convert to list
-            embeddings = list(model.embed([text]))
-            embedding = embeddings[0].tolist()
+            if self._model is None:
+                await asyncio.to_thread(self._get_model)
+            # Inference runs in a worker thread so concurrent requests keep being served
+            embedding = (await self._embed_in_thread([text]))[0]
             logger.debug(f"Generated text embedding with dimension {len(embedding)}")
             return embedding
-            
+
         except Exception as e:
             logger.error(f"Error generating text embedding: {str(e)}")
             raise
-    
-    async def embed_query(self, query: str) -> List[float]:
+
+    async def embed_query(self, query: str) -> np.ndarray:
         """
         Generate embedding for a search query
-        (Alias for embed_text for consistency with RAG interface)
-        
+        (embed_text with an LRU cache, since chats often repeat queries)
+
         Args:
             query: User's text question
-        
+
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a read-only (dimension,) float32 array
         """
-        return await self.embed_text(query)
-    
-    async def embed_texts_batch(self, texts: List[str]) -> List[List[float]]:
+        embedding = self._query_cache.get(query)
+        if embedding is None:
+            embedding = await self.embed_text(query)
+            # Shared with later callers through the cache, so freeze it
+            embedding.flags.writeable = False
+            self._query_cache[query] = embedding
+        return embedding
+
+    async def embed_texts_batch(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts in batch
-        More efficient for processing multiple chunks
-        
+        Mini-batches run concurrently in worker threads (ONNX Runtime
+        releases the GIL), keeping the event loop responsive
+
         Args:
             texts: List of text strings
-        
+
         Returns:
-            List of embedding vectors
+            (len(texts), dimension) float16 array of embedding vectors
+            (half the memory of float32 while the document is being indexed)
         """
         try:
             if not texts:
-                return []
-            
-            model = self._get_model()
-            
-            # FastEmbed handles batching efficiently
-            embeddings = list(model.embed(texts))
-            result = [emb.tolist() for emb in embeddings]
-            
+                return np.empty((0, settings.embedding_dimension), dtype=np.float16)
+
+            # Load once up front so worker threads don't race on the lazy init
+            await asyncio.to_thread(self._get_model)
+
+            batch_size = settings.embedding_batch_size
+            batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+            results = await asyncio.gather(*(self._embed_in_thread(b) for b in batches))
+            result = np.concatenate(results).astype(np.float16)
+
             logger.info(f"Generated {len(result)} embeddings in batch")
             return result
-            
+
         except Exception as e:
             logger.error(f"Error in batch embedding: {str(e)}")
             raise
@@ -6,27 +6,107 @@ Handles PDF storage, text extraction, and chunking for RAG pipeline
 import os
 import io
 import base64
+import pickle
+import time
+import shutil
+import asyncio
 import logging
+import threading
+import multiprocessing
+from bisect import bisect_right
+from itertools import accumulate
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
 from dataclasses import dataclass
 import fitz  # PyMuPDF
+from cachetools import LRUCache, TTLCache
+from fastapi import UploadFile
 
-from config import get_settings
+from config import settings
+from pdf_extract import TEXT_EXTRACT_FLAGS, extract_page_texts
+from .embedding_service import embedding_service
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
+# Block size when copying uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
 
-@dataclass
+
+# JPEG quality for rendered page images, and the byte budget for caching them
+PAGE_IMAGE_QUALITY = 80
+PAGE_IMAGE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Open PDF handles kept for reuse across extraction and page renders
+DOC_CACHE_SIZE = 8
+
+# Directory mtimes come from a coarse clock, so a change in the same tick as the
+# previous one leaves the mtime as it was; a listing is only cached once the upload
+# directory has been unchanged for this long (as git treats "racily clean" entries)
+LIST_CACHE_SETTLE_NS = 1_000_000_000
+
+# Documents with at least this many pages are extracted in parallel worker processes
+# (on multi-core machines; with one core the pool only adds overhead)
+PARALLEL_EXTRACT_MIN_PAGES = 64
+EXTRACT_WORKERS = os.cpu_count() or 1
+
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size"""
+
+
+@dataclass(slots=True)
 class TextChunk:
-    """Represents a text chunk from a document"""
+    """Represents a text chunk from a document (slotted: documents produce many)"""
     text: str
     chunk_index: int
     page_num: int  # Page where chunk starts
     start_char: int  # Character position in full document
 
 
+class _TokenOffsets:
+    """
+    (start_char, end_char) of each token of a text encoded page by page
+    Reads must not go back before the older of the two most recently read
+    pages (true of chunk windows, whose starts and ends both move forward).
+    A page's offsets are only built when one of its tokens is read, and pages
+    left behind are released as reading advances, so a long document never
+    holds, or frees with the GIL held in one go, millions of token objects
+    """
+    
+    def __init__(self, page_starts: List[int], encodings: list):
+        self._page_starts = page_starts
+        self._encodings = encodings
+        # Index of each page's first token, plus the total token count
+        self._token_starts = list(accumulate((len(enc) for enc in encodings), initial=0))
+        # Offsets of the two most recently read pages (window start and end)
+        self._pages: "OrderedDict[int, list]" = OrderedDict()
+        self._released = 0
+    
+    def __len__(self) -> int:
+        return self._token_starts[-1]
+    
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        page = bisect_right(self._token_starts, index) - 1
+        offsets = self._pages.get(page)
+        if offsets is None:
+            if len(self._pages) == 2:
+                self._pages.popitem(last=False)
+            offsets = self._pages[page] = self._encodings[page].offsets
+            # Encodings before every page still in use won't be read again
+            oldest = min(self._pages)
+            while self._released < oldest:
+                self._encodings[self._released] = None
+                self._released += 1
+        else:
+            self._pages.move_to_end(page)
+        start, end = offsets[index - self._token_starts[page]]
+        base = self._page_starts[page]
+        return base + start, base + end
+
+
 class PDFService:
     """
     PDF Service with Text Extraction and Chunking
@@ -38,63 +118,186 @@ class PDFService:
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         self.chunk_size = settings.chunk_size
         self.chunk_overlap = settings.chunk_overlap
+        
+        # Short-lived caches: status polling re-reads the same metadata many times a second
+        self._metadata_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+        # Listing keyed by the upload directory's mtime, which every upload and delete
+        # (from any worker process) bumps: (st_mtime_ns, documents)
+        self._list_cache: Optional[Tuple[int, List[dict]]] = None
+        # Rendered page images keyed by (doc_id, page_num, dpi), bounded by total bytes
+        self._page_image_cache: LRUCache = LRUCache(maxsize=PAGE_IMAGE_CACHE_BYTES, getsizeof=len)
+        
+        # Worker processes for extracting long documents (created on first use)
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        
+        # Open MuPDF handles, most recently used last: doc_id -> (pdf mtime_ns, document, lock)
+        self._doc_cache: "OrderedDict[str, Tuple[int, fitz.Document, threading.Lock]]" = OrderedDict()
+        self._doc_cache_lock = threading.Lock()
+    
+    def _invalidate_caches(self, doc_id: str) -> None:
+        """Drop cached metadata, handle and page images for a document and the cached listing"""
+        self._close_document(doc_id)
+        self._metadata_cache.pop(doc_id, None)
+        self._list_cache = None
+        for key in [key for key in self._page_image_cache if key[0] == doc_id]:
+            del self._page_image_cache[key]
+    
+    @contextmanager
+    def _open_document(self, doc_id: str) -> Iterator[fitz.Document]:
+        """
+        Borrow an open handle for a document's PDF
+        Handles are kept in a small LRU so repeated extraction and page renders
+        don't re-parse the file; MuPDF documents aren't thread-safe, so the
+        handle's lock is held while it is borrowed
+        Raises FileNotFoundError if the PDF doesn't exist
+        """
+        pdf_path = self.get_pdf_path(doc_id)
+        mtime = pdf_path.stat().st_mtime_ns
+        evicted = []
+        
+        with self._doc_cache_lock:
+            entry = self._doc_cache.get(doc_id)
+            if entry is not None and entry[0] == mtime:
+                self._doc_cache.move_to_end(doc_id)
+            else:
+                if entry is not None:
+                    evicted.append(self._doc_cache.pop(doc_id))  # file was replaced
+                entry = (mtime, fitz.open(pdf_path), threading.Lock())
+                self._doc_cache[doc_id] = entry
+                while len(self._doc_cache) > DOC_CACHE_SIZE:
+                    evicted.append(self._doc_cache.popitem(last=False)[1])
+        
+        for _, doc, lock in evicted:
+            with lock:
+                doc.close()
+        
+        _, doc, lock = entry
+        with lock:
+            if doc.is_closed:
+                # Evicted by another thread before we got the lock: use a private handle
+                with fitz.open(pdf_path) as private_doc:
+                    yield private_doc
+            else:
+                yield doc
+    
+    def _close_document(self, doc_id: str) -> None:
+        """Close and forget a document's cached handle, if any"""
+        with self._doc_cache_lock:
+            entry = self._doc_cache.pop(doc_id, None)
+        if entry is not None:
+            _, doc, lock = entry
+            with lock:
+                doc.close()
     
     def get_pdf_path(self, doc_id: str) -> Path:
         """Get the path for a stored PDF"""
         return self.upload_dir / f"{doc_id}.pdf"
     
-    async def save_pdf(self, doc_id: str, file_content: bytes, original_name: str) -> Tuple[str, int]:
+    def _get_chunks_path(self, doc_id: str) -> Path:
+        """Get the path for a document's cached chunks"""
+        return self.upload_dir / f"{doc_id}.chunks.pkl"
+    
+    async def save_pdf(self, doc_id: str, file: UploadFile, original_name: str) -> Tuple[str, int]:
         """
-        Save uploaded PDF to local storage
+        Copy uploaded PDF to local storage in a worker thread
+        The upload's spooled file is copied in 1 MiB blocks by shutil.copyfileobj,
+        keeping disk I/O and page counting off the event loop
         Returns: (file_path, page_count)
+        Raises FileTooLargeError if the upload exceeds max_file_size_mb
         """
+        pdf_path = self.get_pdf_path(doc_id)
+        max_size = settings.max_file_size_mb * 1024 * 1024
+        
         try:
-            pdf_path = self.get_pdf_path(doc_id)
-            
-            # Save the PDF file
-            with open(pdf_path, "wb") as f:
-                f.write(file_content)
+            # The size is known once the upload is parsed, so reject before copying
+            if file.size is not None and file.size > max_size:
+                raise FileTooLargeError(
+                    f"File too large. Maximum size is {settings.max_file_size_mb}MB"
+                )
             
-            # Get page count
-            doc = fitz.open(pdf_path)
-            page_count = len(doc)
-            doc.close()
-            
-            # Store metadata
-            metadata_path = self.upload_dir / f"{doc_id}.meta"
-            with open(metadata_path, "w") as f:
-                f.write(f"{original_name}\n{page_count}")
+            page_count = await asyncio.to_thread(
+                self._write_pdf, doc_id, file.file, original_name, max_size
+            )
+            self._invalidate_caches(doc_id)
             
             logger.info(f"Saved PDF {original_name} with {page_count} pages as {doc_id}")
             return str(pdf_path), page_count
             
+        except FileTooLargeError:
+            pdf_path.unlink(missing_ok=True)
+            raise
         except Exception as e:
             logger.error(f"Error saving PDF: {str(e)}")
             raise
     
+    def _write_pdf(self, doc_id: str, source: BinaryIO, original_name: str, max_size: int) -> int:
+        """
+        Copy an upload to disk and store its metadata (blocking)
+        Returns the page count
+        """
+        with open(self.get_pdf_path(doc_id), "wb") as f:
+            shutil.copyfileobj(source, f, UPLOAD_CHUNK_SIZE)
+            # Backstop for uploads whose size wasn't reported
+            if f.tell() > max_size:
+                raise FileTooLargeError(
+                    f"File too large. Maximum size is {settings.max_file_size_mb}MB"
+                )
+        
+        # Get page count
+        doc = fitz.open(self.get_pdf_path(doc_id))
+        page_count = len(doc)
+        doc.close()
+        
+        # Store metadata
+        metadata_path = self.upload_dir / f"{doc_id}.meta"
+        with open(metadata_path, "w") as f:
+            f.write(f"{original_name}\n{page_count}")
+        return page_count
+    
     def get_document_metadata(self, doc_id: str) -> Optional[dict]:
-        """Get stored document metadata"""
+        """Get stored document metadata (cached for a few seconds)"""
+        metadata = self._metadata_cache.get(doc_id)
+        if metadata is not None:
+            return metadata
+        
         metadata_path = self.upload_dir / f"{doc_id}.meta"
         if not metadata_path.exists():
             return None
         
         with open(metadata_path, "r") as f:
             lines = f.readlines()
-            return {
+            metadata = {
                 "original_name": lines[0].strip(),
                 "page_count": int(lines[1].strip())
             }
+        self._metadata_cache[doc_id] = metadata
+        return metadata
     
     def list_documents(self) -> List[dict]:
-        """List all stored documents"""
+        """
+        List all stored documents
+        Cached until the upload directory changes; the same list object is
+        returned while the listing is unchanged
+        """
+        started = time.time_ns()
+        mtime = self.upload_dir.stat().st_mtime_ns
+        if self._list_cache is not None and self._list_cache[0] == mtime:
+            return self._list_cache[1]
+        
+        # One directory scan; the PDF's entry replaces separate exists() + stat() calls
+        with os.scandir(self.upload_dir) as it:
+            entries = {entry.name: entry for entry in it}
+        
         documents = []
-        for meta_file in self.upload_dir.glob("*.meta"):
-            doc_id = meta_file.stem
-            metadata = self.get_document_metadata(doc_id)
-            if metadata:
-                pdf_path = self.get_pdf_path(doc_id)
-                if pdf_path.exists():
-                    stat = pdf_path.stat()
+        for name in entries:
+            if not name.endswith(".meta"):
+                continue
+            doc_id = name[:-len(".meta")]
+            pdf_entry = entries.get(f"{doc_id}.pdf")
+            if pdf_entry is not None:
+                metadata = self.get_document_metadata(doc_id)
+                if metadata:
+                    stat = pdf_entry.stat()
                     documents.append({
                         "id": doc_id,
                         "name": metadata["original_name"],
@@ -102,6 +305,9 @@ class PDFService:
                         "size": self._format_size(stat.st_size),
                         "created_at": stat.st_ctime
                     })
+        # A change landing after the scan could still carry this mtime, until a tick passes
+        if started - mtime >= LIST_CACHE_SETTLE_NS:
+            self._list_cache = (mtime, documents)
         return documents
     
     def delete_document(self, doc_id: str) -> bool:
@@ -110,10 +316,13 @@ class PDFService:
             pdf_path = self.get_pdf_path(doc_id)
             metadata_path = self.upload_dir / f"{doc_id}.meta"
             
+            self._close_document(doc_id)
             if pdf_path.exists():
                 pdf_path.unlink()
             if metadata_path.exists():
                 metadata_path.unlink()
+            self._get_chunks_path(doc_id).unlink(missing_ok=True)
+            self._invalidate_caches(doc_id)
             
             logger.info(f"Deleted document {doc_id}")
             return True
@@ -121,6 +330,43 @@ class PDFService:
             logger.error(f"Error deleting document {doc_id}: {str(e)}")
             return False
     
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        """Get the text extraction process pool"""
+        if self._extract_pool is None:
+            # PyMuPDF isn't thread-safe and holds the GIL, so parallelism needs processes.
+            # Workers fork from a server process that has imported only pdf_extract, not
+            # from this one (which runs ONNX/HTTP threads); they still re-import the
+            # __main__ script, which is why the launcher lives in server.py, not main.py
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["pdf_extract"])
+            self._extract_pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=context
+            )
+        return self._extract_pool
+    
+    def shutdown(self) -> None:
+        """Stop the text extraction worker processes and close cached handles"""
+        if self._extract_pool is not None:
+            self._extract_pool.shutdown(cancel_futures=True)
+            self._extract_pool = None
+        for doc_id in list(self._doc_cache):
+            self._close_document(doc_id)
+    
+    async def _extract_page_texts_parallel(self, pdf_path: Path, page_count: int) -> List[str]:
+        """Extract page texts in contiguous page ranges across worker processes"""
+        step = -(-page_count // EXTRACT_WORKERS)  # ceil division
+        loop = asyncio.get_running_loop()
+        pool = self._get_extract_pool()
+        
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool, extract_page_texts, str(pdf_path), start, min(start + step, page_count)
+            )
+            for start in range(0, page_count, step)
+        ))
+        return [text for page_texts in results for text in page_texts]
+    
     async def extract_text(self, doc_id: str) -> Tuple[str, List[Tuple[int, int]]]:
         """
         Extract all text from a PDF document
@@ -135,23 +381,32 @@ class PDFService:
                 logger.error(f"PDF not found: {doc_id}")
                 return "", []
             
-            doc = fitz.open(pdf_path)
-            full_text = ""
+            with self._open_document(doc_id) as doc:
+                page_count = len(doc)
+                parallel = page_count >= PARALLEL_EXTRACT_MIN_PAGES and EXTRACT_WORKERS > 1
+                if not parallel:
+                    page_texts = [doc[i].get_text("text", flags=TEXT_EXTRACT_FLAGS) for i in range(page_count)]
+            
+            # Long documents are extracted in parallel worker processes instead
+            if parallel:
+                page_texts = await self._extract_page_texts_parallel(pdf_path, page_count)
+            
+            # Collect parts and join once; repeated += copies the growing string
+            parts: List[str] = []
+            running_len = 0
             page_boundaries = []
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_boundaries.append((page_num + 1, len(full_text)))  # 1-indexed
-                
-                # Extract text from page
-                page_text = page.get_text("text")
-                full_text += page_text
+            for page_num, page_text in enumerate(page_texts):
+                page_boundaries.append((page_num + 1, running_len))  # 1-indexed
+                parts.append(page_text)
+                running_len += len(page_text)
                 
                 # Add page separator if not ending with newline
                 if page_text and not page_text.endswith("\n"):
-                    full_text += "\n"
+                    parts.append("\n")
+                    running_len += 1
             
-            doc.close()
+            full_text = "".join(parts)
             logger.info(f"Extracted {len(full_text)} characters from {doc_id}")
             return full_text, page_boundaries
             
@@ -170,115 +425,199 @@ class PDFService:
         Returns:
             List of TextChunk objects
         """
+        chunks = list(self._chunk_text_iter(text, page_boundaries))
+        logger.info(f"Created {len(chunks)} chunks from text")
+        return chunks
+    
+    def _chunk_text_iter(self, text: str, page_boundaries: List[Tuple[int, int]]) -> Iterator[TextChunk]:
+        """
+        Lazily split text into overlapping windows of chunk_size tokens
+        Uses the embedding model's tokenizer, so every chunk fits the model's
+        context and chunk counts track what is actually embedded
+        
+        Args:
+            text: Full document text
+            page_boundaries: List of (page_num, start_char) tuples
+        
+        Yields:
+            TextChunk objects in document order
+        """
         if not text:
-            return []
+            return
+        
+        offsets = self._token_offsets(text, page_boundaries)
+        # Leave room for the [CLS]/[SEP] tokens added at embedding time
+        window = max(min(self.chunk_size, settings.embedding_max_length - 2), 1)
+        stride = max(window - self.chunk_overlap, 1)
         
-        chunks = []
-        start = 0
         chunk_index = 0
         
-        while start < len(text):
-            # Calculate end position
-            end = start + self.chunk_size
-            
-            # Try to break at sentence boundary if possible
-            if end < len(text):
-                # Look for sentence endings near the chunk boundary
-                search_start = max(end - 50, start)
-                search_text = text[search_start:end + 50] if end + 50 < len(text) else text[search_start:]
-                
-                # Find best break point (period, question mark, exclamation)
-                best_break = -1
-                for sep in ['. ', '? ', '! ', '\n\n', '\n']:
-                    pos = search_text.rfind(sep)
-                    if pos != -1:
-                        actual_pos = search_start + pos + len(sep)
-                        if actual_pos > start and actual_pos <= end + 50:
-                            best_break = actual_pos
-                            break
-                
-                if best_break > start:
-                    end = best_break
-            
-            # Ensure we don't go past the end
-            end = min(end, len(text))
+        # Index into page_boundaries of the page containing start; chunk starts move
+        # forward, so the cursor only advances (O(pages + chunks) in total)
+        page_cursor = 0
+        
+        for token_start in range(0, len(offsets), stride):
+            token_end = min(token_start + window, len(offsets))
             
-            # Extract chunk text
-            chunk_text = text[start:end].strip()
+            # Slice the original text so chunks keep their formatting
+            start = offsets[token_start][0]
+            end = offsets[token_end - 1][1]
+            chunk_text = text[start:end]
             
             if chunk_text:  # Only add non-empty chunks
                 # Determine which page this chunk starts on
-                page_num = 1
-                for pn, char_start in page_boundaries:
-                    if start >= char_start:
-                        page_num = pn
-                    else:
-                        break
+                while page_cursor + 1 < len(page_boundaries) and page_boundaries[page_cursor + 1][1] <= start:
+                    page_cursor += 1
+                if page_boundaries and page_boundaries[page_cursor][1] <= start:
+                    page_num = page_boundaries[page_cursor][0]
+                else:
+                    page_num = 1
                 
-                chunks.append(TextChunk(
+                yield TextChunk(
                     text=chunk_text,
                     chunk_index=chunk_index,
                     page_num=page_num,
                     start_char=start
-                ))
+                )
                 chunk_index += 1
             
-            # Move start position with overlap
-            start = end - self.chunk_overlap
-            if start <= chunks[-1].start_char if chunks else 0:
-                start = end  # Prevent infinite loop
+            if token_end == len(offsets):
+                break
+    
+    def _token_offsets(self, text: str, page_boundaries: List[Tuple[int, int]]) -> _TokenOffsets:
+        """
+        Tokenize text and map each token back to its (start_char, end_char) in text
+        Pages are encoded as one batch, which the tokenizer runs in parallel native
+        code; extract_text ends every page with a newline, so no token spans a
+        page break and the result matches encoding the whole text at once
+        """
+        starts = [0] + [char_start for _, char_start in page_boundaries if 0 < char_start < len(text)]
+        ends = starts[1:] + [len(text)]
         
-        logger.info(f"Created {len(chunks)} chunks from text")
-        return chunks
+        encodings = embedding_service.get_tokenizer().encode_batch(
+            [text[start:end] for start, end in zip(starts, ends)],
+            add_special_tokens=False
+        )
+        return _TokenOffsets(starts, encodings)
     
-    async def extract_and_chunk(self, doc_id: str) -> List[TextChunk]:
+    async def extract_and_chunk(
+        self,
+        doc_id: str,
+        stream: bool = False
+    ) -> Union[List[TextChunk], Iterator[TextChunk]]:
         """
         Extract text from PDF and split into chunks
         Main method for document processing pipeline
         
         Args:
             doc_id: Document identifier
+            stream: Return a lazy iterator so callers can consume chunks in
+                batches without holding them all (not written to the chunk cache).
+                Advancing it tokenizes the document on first use, so consume it
+                off the event loop
         
         Returns:
-            List of TextChunk objects ready for embedding
+            List (or iterator, if stream) of TextChunk objects ready for embedding
         """
+        pdf_path = self.get_pdf_path(doc_id)
+        cache_key = None
+        if pdf_path.exists():
+            # Everything that decides the token windows (the tokenizer may load from disk)
+            cache_key = (
+                settings.embedding_model,
+                await asyncio.to_thread(embedding_service.get_tokenizer_fingerprint),
+                settings.embedding_max_length,
+                self.chunk_size,
+                self.chunk_overlap,
+                pdf_path.stat().st_mtime_ns
+            )
+            chunks = await asyncio.to_thread(self._load_cached_chunks, doc_id, cache_key)
+            if chunks is not None:
+                return iter(chunks) if stream else chunks
+        
         text, page_boundaries = await self.extract_text(doc_id)
         if not text:
-            return []
+            return iter(()) if stream else []
         
-        chunks = self.chunk_text(text, page_boundaries)
+        if stream:
+            return self._chunk_text_iter(text, page_boundaries)
+        
+        # Tokenizing a long document takes seconds, so it runs in a worker thread
+        chunks = await asyncio.to_thread(self.chunk_text, text, page_boundaries)
+        if cache_key is not None:
+            await asyncio.to_thread(self._store_cached_chunks, doc_id, cache_key, chunks)
         return chunks
     
-    async def render_page_to_base64(self, doc_id: str, page_num: int, dpi: int = 100) -> Optional[str]:
+    def _load_cached_chunks(self, doc_id: str, cache_key: tuple) -> Optional[List[TextChunk]]:
         """
-        Render page to base64 encoded PNG string (for frontend display)
+        Load chunks cached by a previous extract_and_chunk
+        Returns None if there is no cache or it was built for a different
+        file version or chunking config
         """
+        chunks_path = self._get_chunks_path(doc_id)
+        if not chunks_path.exists():
+            return None
+        
+        try:
+            with open(chunks_path, "rb") as f:
+                if pickle.load(f) != cache_key:
+                    return None
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable chunk cache for {doc_id}: {str(e)}")
+            return None
+    
+    def _store_cached_chunks(self, doc_id: str, cache_key: tuple, chunks: List[TextChunk]) -> None:
+        """Persist chunks beside the PDF, headed by the key they were built with"""
+        try:
+            with open(self._get_chunks_path(doc_id), "wb") as f:
+                pickle.dump(cache_key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(chunks, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Could not cache chunks for {doc_id}: {str(e)}")
+    
+    async def render_page_to_jpeg_bytes(self, doc_id: str, page_num: int, dpi: int = 100) -> Optional[bytes]:
+        """
+        Render page to JPEG bytes (for frontend display)
+        Several times smaller than PNG for rendered pages; recent renders are
+        cached since users scroll back and forth
+        """
+        cache_key = (doc_id, page_num, dpi)
+        img_data = self._page_image_cache.get(cache_key)
+        if img_data is not None:
+            return img_data
+        
         try:
             pdf_path = self.get_pdf_path(doc_id)
             if not pdf_path.exists():
                 return None
             
-            doc = fitz.open(pdf_path)
-            
-            if page_num < 1 or page_num > len(doc):
-                doc.close()
-                return None
-            
-            page = doc[page_num - 1]
-            zoom = dpi / 72
-            matrix = fitz.Matrix(zoom, zoom)
-            pixmap = page.get_pixmap(matrix=matrix)
-            
-            img_data = pixmap.tobytes("png")
-            base64_str = base64.b64encode(img_data).decode("utf-8")
+            with self._open_document(doc_id) as doc:
+                if page_num < 1 or page_num > len(doc):
+                    return None
+                
+                page = doc[page_num - 1]
+                zoom = dpi / 72
+                matrix = fitz.Matrix(zoom, zoom)
+                pixmap = page.get_pixmap(matrix=matrix)
             
-            doc.close()
-            return base64_str
+            img_data = pixmap.tobytes("jpeg", jpg_quality=PAGE_IMAGE_QUALITY)
+            self._page_image_cache[cache_key] = img_data
+            return img_data
             
         except Exception as e:
             logger.error(f"Error rendering page {page_num} of {doc_id}: {str(e)}")
             return None
     
+    async def render_page_to_base64(self, doc_id: str, page_num: int, dpi: int = 100) -> Optional[str]:
+        """
+        Render page to base64 encoded JPEG string
+        """
+        img_data = await self.render_page_to_jpeg_bytes(doc_id, page_num, dpi)
+        if img_data is None:
+            return None
+        return base64.b64encode(img_data).decode("utf-8")
+    
     def _format_size(self, size_bytes: int) -> str:
         """Format file size for display"""
         if size_bytes < 1024:
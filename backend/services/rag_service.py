@@ -3,22 +3,33 @@ RAG Service with Google Gemini via REST API
 Text-optimized RAG pipeline with FastEmbed and Pinecone
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import httpx
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 # Force override system environment variables with .env values
 load_dotenv(override=True)
 
-from config import get_settings
+from config import settings
 from .pdf_service import pdf_service
 from .embedding_service import embedding_service
-from .vector_store import vector_store
+from .vector_store import vector_store, QUERY_CACHE_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Max tokens of document text sent for a summary
+SUMMARY_TOKEN_BUDGET = 12000
+
+# How long startup waits to pre-connect to Gemini
+WARM_UP_TIMEOUT_SECONDS = 5.0
+
+# Start of the answer returned when generation fails (such answers aren't cached)
+ANSWER_ERROR_PREFIX = "I encountered an error while analyzing the documents"
 
 
 class RAGService:
@@ -27,6 +38,17 @@ class RAGService:
     Uses FastEmbed for text embeddings and Gemini (via REST API) for answer generation
     """
     
+    # Identical for every question, and placed before the variable content so
+    # Gemini's implicit prefix caching can reuse it across calls
+    _INSTRUCTIONS = """You are an intelligent document assistant. Answer the user's question based on the provided context from their documents.
+
+Instructions:
+1. Answer based ONLY on the information provided in the context below
+2. If the context doesn't contain enough information to fully answer, say so
+3. Cite your sources by mentioning which document and page the information comes from
+4. Be concise but thorough
+5. If multiple sources contain relevant information, synthesize them"""
+    
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
@@ -35,14 +57,80 @@ class RAGService:
         self.model_name = "gemini-2.5-flash"
         self.temperature = 0.3
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        # Keep-alive HTTP/2 client reused across requests (created on first use)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Answers keyed by (query, top_k, doc_ids); cleared when this process changes the
+        # index, and expire like cached searches so other workers' changes show up too
+        self._query_cache: TTLCache = TTLCache(maxsize=256, ttl=QUERY_CACHE_TTL_SECONDS)
+        # Bumped by clear_query_cache(), so answers generated while the index
+        # changed aren't cached after it
+        self._query_cache_generation = 0
         logger.info(f"Gemini model '{self.model_name}' initialized via REST API")
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, so TLS and connections amortize across calls"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+            )
+        return self._client
+    
+    async def warm_up(self) -> None:
+        """
+        Open the pooled connection to Gemini ahead of the first chat request
+        Startup waits on this, so it gives up sooner than chat requests do
+        """
+        await self._get_client().head(self.base_url, timeout=WARM_UP_TIMEOUT_SECONDS)
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client and its pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def clear_query_cache(self) -> None:
+        """Forget cached answers (call when documents are indexed or deleted)"""
+        self._query_cache_generation += 1
+        self._query_cache.clear()
+    
     async def process_query(
         self,
         query: str,
         top_k: int = 5,
         doc_ids: Optional[List[str]] = None
     ) -> Dict[str, Any]:
+        """
+        Answer a query, reusing the cached result for a repeated
+        (query, top_k, doc_ids) while the indexed documents are unchanged
+        
+        Args:
+            query: User's question
+            top_k: Number of chunks to retrieve
+            doc_ids: Optional filter by documents
+        
+        Returns:
+            Answer with sources
+        """
+        cache_key = (query, top_k, tuple(sorted(doc_ids or [])))
+        result = self._query_cache.get(cache_key)
+        if result is not None:
+            logger.info(f"Serving cached answer for query: {query[:50]}...")
+            return result
+        
+        generation = self._query_cache_generation
+        result, cacheable = await self._run_query(query, top_k, doc_ids)
+        if cacheable and generation == self._query_cache_generation:
+            self._query_cache[cache_key] = result
+        return result
+    
+    async def _run_query(
+        self,
+        query: str,
+        top_k: int,
+        doc_ids: Optional[List[str]]
+    ) -> Tuple[Dict[str, Any], bool]:
         """
         Complete RAG pipeline:
         1. Embed query using FastEmbed
@@ -55,7 +143,7 @@ class RAGService:
             doc_ids: Optional filter by documents
         
         Returns:
-            Answer with sources
+            Tuple of (answer with sources, whether the answer may be cached)
         """
         try:
             # Step 1: Embed the query
@@ -74,7 +162,7 @@ class RAGService:
                     "answer": "I couldn't find any relevant information in the uploaded documents. Please make sure you have uploaded documents and try again.",
                     "sources": [],
                     "query": query
-                }
+                }, False
             
             # Step 3: Prepare sources with chunk text
             sources = []
@@ -105,7 +193,7 @@ class RAGService:
                 "answer": answer,
                 "sources": sources,
                 "query": query
-            }
+            }, not answer.startswith(ANSWER_ERROR_PREFIX)
             
         except Exception as e:
             logger.error(f"Error in RAG pipeline: {str(e)}")
@@ -129,21 +217,8 @@ class RAGService:
             
             context_text = "\n\n---\n\n".join(context_parts)
             
-            prompt = f"""You are an intelligent document assistant. Answer the user's question based on the provided context from their documents.
-
-Question: {query}
-
-Context from documents:
-{context_text}
-
-Instructions:
-1. Answer based ONLY on the information provided in the context above
-2. If the context doesn't contain enough information to fully answer, say so
-3. Cite your sources by mentioning which document and page the information comes from
-4. Be concise but thorough
-5. If multiple sources contain relevant information, synthesize them
-
-Answer:"""
+            # Static instructions first so every prompt shares a cacheable prefix
+            prompt = f"{self._INSTRUCTIONS}\n\nContext from documents:\n{context_text}\n\nQuestion: {query}\n\nAnswer:"
 
             # Generate response using Gemini REST API
             answer = await self._call_gemini_api(prompt)
@@ -153,7 +228,7 @@ Answer:"""
             
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}")
-            return f"I encountered an error while analyzing the documents: {str(e)}"
+            return f"{ANSWER_ERROR_PREFIX}: {str(e)}"
     
     async def _call_gemini_api(self, prompt: str) -> str:
         """
@@ -174,39 +249,76 @@ Answer:"""
             }
         }
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(url, json=payload)
-            
-            if response.status_code != 200:
-                error_msg = response.text
-                logger.error(f"Gemini API error: {response.status_code} - {error_msg}")
-                raise Exception(f"Gemini API error: {response.status_code}")
-            
-            result = response.json()
-            
-            # Extract text from response
-            try:
-                return result["candidates"][0]["content"]["parts"][0]["text"]
-            except (KeyError, IndexError) as e:
-                logger.error(f"Unexpected response structure: {result}")
-                raise Exception(f"Failed to parse Gemini response: {e}")
+        response = await self._get_client().post(
+            url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}
+        )
+        
+        if response.status_code != 200:
+            error_msg = response.text
+            logger.error(f"Gemini API error: {response.status_code} - {error_msg}")
+            raise Exception(f"Gemini API error: {response.status_code}")
+        
+        result = orjson.loads(response.content)
+        
+        # Extract text from response
+        try:
+            return result["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError) as e:
+            logger.error(f"Unexpected response structure: {result}")
+            raise Exception(f"Failed to parse Gemini response: {e}")
+    
+    def _take_within_budget(self, texts: List[str], budget: int) -> List[str]:
+        """
+        Take texts from the start until their combined token count would exceed budget
+        Counts with the embedding tokenizer, or estimates ~4 characters per token
+        if it isn't available
+        
+        Args:
+            texts: Candidate texts in order
+            budget: Maximum total tokens
+        
+        Returns:
+            Leading texts that fit in the budget
+        """
+        try:
+            tokenizer = embedding_service.get_tokenizer()
+            # Lazy, so only texts up to the cut-off are tokenized
+            counts = (len(tokenizer.encode(text, add_special_tokens=False).ids) for text in texts)
+        except Exception as e:
+            logger.warning(f"Tokenizer unavailable, estimating token counts: {str(e)}")
+            counts = (len(text) // 4 for text in texts)
+        
+        taken = []
+        used = 0
+        for text, count in zip(texts, counts):
+            if used + count > budget:
+                break
+            taken.append(text)
+            used += count
+        return taken
     
     async def summarize_document(self, doc_id: str) -> str:
         """
         Generate a summary of an entire document
         """
         try:
-            # Extract text from document
-            chunks = await pdf_service.extract_and_chunk(doc_id)
+            # Extract text from document while reading its metadata
+            chunks, metadata = await asyncio.gather(
+                pdf_service.extract_and_chunk(doc_id),
+                asyncio.to_thread(pdf_service.get_document_metadata, doc_id)
+            )
             
             if not chunks:
                 return "Could not load document for summarization."
             
-            metadata = pdf_service.get_document_metadata(doc_id)
             doc_name = metadata["original_name"] if metadata else "Unknown Document"
             
-            # Use first chunks for summary (limit to avoid token limits)
-            summary_text = "\n\n".join([chunk.text for chunk in chunks[:10]])
+            # Use leading chunks up to the token budget (limit to avoid token limits)
+            summary_text = "\n\n".join(self._take_within_budget(
+                [chunk.text for chunk in chunks], SUMMARY_TOKEN_BUDGET
+            ))
             
             prompt = f"""Please provide a comprehensive summary of this document: "{doc_name}"
 
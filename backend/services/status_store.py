@@ -0,0 +1,152 @@
+"""
+Processing Status Store
+Tracks document processing progress in Redis (shared across workers and
+restarts) with an in-memory LRU fallback when Redis isn't configured
+"""
+
+import logging
+from typing import Dict, List, Optional
+from cachetools import LRUCache
+import redis.asyncio as redis
+
+from config import settings
+from models import DocumentStatus, ProcessingStatus
+
+logger = logging.getLogger(__name__)
+
+# Progress updates only touch a status that still exists, so one deleted (or
+# expired) mid-processing isn't recreated as a partial hash without doc_id.
+# KEYS[1] = status key, ARGV = ttl, field, value, field, value, ...
+UPDATE_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class StatusStore:
+    """
+    Processing Status Store
+    Each status is a Redis hash at status:{doc_id} with a TTL; every write is
+    one pipelined round-trip. Without Redis, statuses live in a bounded LRU.
+    """
+
+    def __init__(self):
+        self._redis: Optional[redis.Redis] = None
+        self._update_script = None
+        # Bounded so long-running workers don't accumulate status for every upload ever seen
+        self._memory: LRUCache = LRUCache(maxsize=2048)
+        self.ttl = settings.status_ttl_seconds
+
+    async def connect(self) -> None:
+        """Connect to Redis if a URL is configured"""
+        if not settings.redis_url:
+            logger.info("REDIS_URL not set, tracking processing status in memory")
+            return
+
+        client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        await client.ping()
+        self._redis = client
+        self._update_script = client.register_script(UPDATE_IF_EXISTS_SCRIPT)
+        logger.info("Connected to Redis for processing status")
+
+    async def close(self) -> None:
+        """Close the Redis connection"""
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    @staticmethod
+    def _key(doc_id: str) -> str:
+        return f"status:{doc_id}"
+
+    async def set(self, status: ProcessingStatus) -> None:
+        """Store a status (replaces any previous one for the document)"""
+        if self._redis is None:
+            self._memory[status.doc_id] = status
+            return
+
+        key = self._key(status.doc_id)
+        mapping = {
+            k: (v.value if isinstance(v, DocumentStatus) else v)
+            for k, v in status.model_dump(exclude_none=True).items()
+        }
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def update(
+        self,
+        status: ProcessingStatus,
+        state: DocumentStatus,
+        progress: int,
+        message: str
+    ) -> None:
+        """
+        Update a tracked status in place and persist it
+        Avoids re-running Pydantic validation on every progress bump; a status
+        that was deleted (or has expired or been evicted) stays gone
+        """
+        status.status = state
+        status.progress = progress
+        status.message = message
+
+        if self._redis is None:
+            # Like the Redis script, only touch a status that still exists; re-assigning
+            # marks it recently used, so one being updated isn't the next evicted
+            if status.doc_id in self._memory:
+                self._memory[status.doc_id] = status
+            return
+
+        args = [self.ttl, "status", state.value, "progress", progress, "message", message]
+        if status.total_pages is not None:
+            args += ["total_pages", status.total_pages]
+        await self._update_script(keys=[self._key(status.doc_id)], args=args)
+
+    async def get(self, doc_id: str) -> Optional[ProcessingStatus]:
+        """Get the tracked status for a document, if any"""
+        if self._redis is None:
+            return self._memory.get(doc_id)
+
+        data = await self._redis.hgetall(self._key(doc_id))
+        if not data:
+            return None
+        return ProcessingStatus.model_validate(data)
+
+    async def get_states(self, doc_ids: List[str]) -> Dict[str, DocumentStatus]:
+        """Get just the status enum for each tracked document (one round-trip)"""
+        if self._redis is None:
+            return {
+                doc_id: self._memory[doc_id].status
+                for doc_id in doc_ids
+                if doc_id in self._memory
+            }
+
+        if not doc_ids:
+            return {}
+        pipe = self._redis.pipeline(transaction=False)
+        for doc_id in doc_ids:
+            pipe.hget(self._key(doc_id), "status")
+        states = await pipe.execute()
+        return {
+            doc_id: DocumentStatus(state)
+            for doc_id, state in zip(doc_ids, states)
+            if state is not None
+        }
+
+    async def delete(self, doc_id: str) -> None:
+        """Stop tracking a document"""
+        if self._redis is None:
+            self._memory.pop(doc_id, None)
+            return
+
+        await self._redis.delete(self._key(doc_id))
+
+
+# Singleton instance
+status_store = StatusStore()
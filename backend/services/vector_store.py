@@ -3,15 +3,283 @@ Vector Store Service using Pinecone
 Handles storage and retrieval of text chunk embeddings
 """
 
+import time
+import base64
+import random
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import zstandard as zstd
 from pinecone import Pinecone, ServerlessSpec
+from pinecone.errors import ApiError, PineconeConnectionError, PineconeTimeoutError
 
-from config import get_settings
+from config import settings
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Pinecone accepts at most 100 vectors per upsert; batches are sent in parallel
+UPSERT_BATCH_SIZE = 100
+UPSERT_WORKERS = 8
+
+# Upserts are also packed to stay under Pinecone's 2 MB request limit, using an
+# estimate of each vector's JSON size (values plus metadata)
+UPSERT_MAX_BYTES = 2_000_000
+UPSERT_BYTES_PER_VALUE = 20  # a float serialized as JSON text
+UPSERT_METADATA_OVERHEAD = 200  # keys, ids and the fixed metadata fields
+
+# Max HTTP connections the client keeps open to Pinecone (index handles inherit it);
+# sized for the upsert threads plus concurrent searches
+CONNECTION_POOL_MAXSIZE = 32
+
+# Guards one-time creation of the shared index handle
+_index_lock = threading.Lock()
+
+# Lifetime of cached search results; caches are only cleared by the process that
+# changes the index, so this bounds staleness across workers
+QUERY_CACHE_TTL_SECONDS = 300
+
+# Retries for rate-limited (429) or failed (5xx) upserts, with exponential backoff
+UPSERT_MAX_RETRIES = 4
+UPSERT_BACKOFF_SECONDS = 0.5
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a Pinecone error is transient (rate limit, server or connection error)"""
+    if isinstance(error, ApiError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(
+        error, (PineconeConnectionError, PineconeTimeoutError, ConnectionError, TimeoutError)
+    )
+
+
+def _pack_batches(sizes: List[int], max_count: int, max_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Group consecutive items into batches of at most max_count items and
+    (unless a single item is larger) max_bytes total size
+    
+    Returns:
+        (start, stop) index ranges, in order
+    """
+    batches = []
+    start = 0
+    current_bytes = 0
+    for i, size in enumerate(sizes):
+        if i > start and (i - start == max_count or current_bytes + size > max_bytes):
+            batches.append((start, i))
+            start = i
+            current_bytes = 0
+        current_bytes += size
+    if start < len(sizes):
+        batches.append((start, len(sizes)))
+    return batches
+
+
+# Chunk text is stored zstd-compressed and base85-encoded behind this marker when
+# that's smaller (typically chunks of a few hundred characters or more); values without
+# it are plain text, which also covers vectors written before compression.
+# Packed values are "~z:<n>:" + the first n characters as plain text (so the Pinecone
+# console still shows how each chunk starts) + the encoded rest
+CHUNK_TEXT_MAGIC = "~z:"
+CHUNK_TEXT_PREVIEW_CHARS = 32
+CHUNK_TEXT_ZSTD_LEVEL = 3
+
+# Shared codec contexts (only used from the event loop thread)
+_compressor = zstd.ZstdCompressor(level=CHUNK_TEXT_ZSTD_LEVEL)
+_decompressor = zstd.ZstdDecompressor()
+
+
+def _pack_chunk_text(text: str) -> str:
+    """Encode chunk text for metadata, compressing when it saves space"""
+    raw = text.encode()
+    preview = text[:CHUNK_TEXT_PREVIEW_CHARS]
+    rest = base64.b85encode(_compressor.compress(text[len(preview):].encode())).decode("ascii")
+    packed = f"{CHUNK_TEXT_MAGIC}{len(preview)}:{preview}{rest}"
+    # Text that happens to start with the marker is always packed, so it decodes unambiguously
+    if len(packed.encode()) < len(raw) or text.startswith(CHUNK_TEXT_MAGIC):
+        return packed
+    return text
+
+
+def _unpack_chunk_text(value: str) -> str:
+    """Decode a chunk_text metadata value (compressed or plain)"""
+    if value.startswith(CHUNK_TEXT_MAGIC):
+        length, _, body = value[len(CHUNK_TEXT_MAGIC):].partition(":")
+        preview_end = int(length)
+        data = base64.b85decode(body[preview_end:])
+        return body[:preview_end] + _decompressor.decompress(data).decode()
+    return value
+
+
+def _match_to_dict(match) -> Dict[str, Any]:
+    """Flatten a Pinecone query match into a search result"""
+    # Bound once: every field comes from the same metadata dict
+    get = match.metadata.get
+    return {
+        "vector_id": match.id,
+        "score": float(match.score),
+        "doc_id": get("doc_id"),
+        "doc_name": get("doc_name"),
+        # Pinecone returns metadata numbers as floats
+        "chunk_index": int(get("chunk_index", 0)),
+        "chunk_text": _unpack_chunk_text(get("chunk_text", "")),
+        "page_num": int(get("page_num", 0))
+    }
+
+
+def _unit_vector(embedding: np.ndarray) -> np.ndarray:
+    """L2-normalized copy of an embedding"""
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm else embedding.copy()
+
+
+class QueryCache:
+    """
+    Semantic LRU cache of search results with a TTL
+    An exact (rounded) query embedding hits directly; otherwise the query is
+    scored against every cached query vector with one matrix-vector product,
+    and the closest earlier search with the same top_k and document filter is
+    reused if its cosine similarity clears similarity_threshold. Thread-safe
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        max_size: int = 1024,
+        ttl_seconds: float = QUERY_CACHE_TTL_SECONDS,
+        similarity_threshold: float = 0.95
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # key -> (inserted_at, matches, row of the query vector in _matrix)
+        self._entries: "OrderedDict[tuple, Tuple[float, List[Dict[str, Any]], int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        
+        # Unit query vectors, one row per entry. Freed rows (a stack, most recently
+        # freed first) are reused before unused ones, which are handed out lowest
+        # first, so scoring only has to cover the first _rows: a high-water mark
+        # that clear() resets
+        self._matrix = np.zeros((max_size, dimension), dtype=np.float32)
+        self._row_keys: List[Optional[tuple]] = [None] * max_size
+        self._free_rows = list(range(max_size - 1, -1, -1))
+        self._rows = 0
+        # Searches with the same (top_k, doc_ids) share a group id, recorded per row
+        # (-1 for free rows); filter -> [group id, live rows]
+        self._row_groups = np.full(max_size, -1, dtype=np.int64)
+        self._groups: Dict[tuple, List[int]] = {}
+        self._next_group = 0
+        # Bumped by clear(), so results of searches that started before the index
+        # changed aren't cached after it
+        self.generation = 0
+    
+    @staticmethod
+    def _make_key(
+        embedding: np.ndarray,
+        top_k: int,
+        doc_ids: Optional[List[str]]
+    ) -> tuple:
+        """Build the exact-match key for a search (embedding rounded to 3 decimals)"""
+        return (
+            np.round(embedding, 3).tobytes(),
+            top_k,
+            tuple(sorted(doc_ids or ()))
+        )
+    
+    def _remove(self, key: tuple) -> None:
+        """Remove an entry and free its row (lock held)"""
+        row = self._entries.pop(key)[2]
+        self._row_keys[row] = None
+        self._free_rows.append(row)
+        self._row_groups[row] = -1
+        group = self._groups[key[1:]]
+        group[1] -= 1
+        if not group[1]:
+            del self._groups[key[1:]]
+    
+    def _lookup(self, key: tuple) -> Optional[List[Dict[str, Any]]]:
+        """Get a live entry's matches, dropping it if expired (lock held)"""
+        inserted_at, matches = self._entries[key][:2]
+        if time.monotonic() - inserted_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return matches
+    
+    def get(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        doc_ids: Optional[List[str]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get cached matches for this or a near-identical query, or None"""
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+        key = self._make_key(embedding, top_k, doc_ids)
+        with self._lock:
+            if key in self._entries:
+                return self._lookup(key)
+            
+            # Only reuse searches with the same top_k and document filter
+            group = self._groups.get(key[1:])
+            if group is None:
+                return None
+            
+            rows = self._rows
+            scores = self._matrix[:rows] @ _unit_vector(embedding)
+            scores[self._row_groups[:rows] != group[0]] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            return self._lookup(self._row_keys[best])
+    
+    def set(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        doc_ids: Optional[List[str]],
+        matches: List[Dict[str, Any]],
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Cache matches, evicting the least recently used entry when full
+        Skipped if generation is given and the cache has been cleared since
+        """
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+        key = self._make_key(embedding, top_k, doc_ids)
+        vector = _unit_vector(embedding)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            elif len(self._entries) >= self.max_size:
+                self._remove(next(iter(self._entries)))
+            
+            row = self._free_rows.pop()
+            self._rows = max(self._rows, row + 1)
+            self._matrix[row] = vector
+            self._row_keys[row] = key
+            group = self._groups.get(key[1:])
+            if group is None:
+                group = self._groups[key[1:]] = [self._next_group, 0]
+                self._next_group += 1
+            group[1] += 1
+            self._row_groups[row] = group[0]
+            self._entries[key] = (time.monotonic(), matches, row)
+    
+    def clear(self) -> None:
+        """Drop every cached result"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._groups.clear()
+            self._row_groups.fill(-1)
+            self._row_keys = [None] * self.max_size
+            self._free_rows = list(range(self.max_size - 1, -1, -1))
+            self._rows = 0
 
 
 class VectorStore:
@@ -21,33 +289,76 @@ class VectorStore:
     """
     
     def __init__(self):
-        self.pc = Pinecone(api_key=settings.pinecone_api_key)
+        self.pc = Pinecone(
+            api_key=settings.pinecone_api_key,
+            connection_pool_maxsize=CONNECTION_POOL_MAXSIZE
+        )
         self.index_name = settings.pinecone_index_name
         self._index = None
+        # Repeat searches skip the Pinecone round-trip; cleared whenever vectors change
+        self.query_cache = QueryCache(settings.embedding_dimension)
+        # Searches currently querying Pinecone, so concurrent identical ones share a call
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # Threads for the synchronous client's upserts (created on first use)
+        self._upsert_pool: Optional[ThreadPoolExecutor] = None
+    
+    def _get_upsert_pool(self) -> ThreadPoolExecutor:
+        """
+        Get the upsert thread pool
+        Dedicated so ingest doesn't compete with embedding work on the default executor
+        """
+        if self._upsert_pool is None:
+            self._upsert_pool = ThreadPoolExecutor(
+                max_workers=UPSERT_WORKERS, thread_name_prefix="pinecone-upsert"
+            )
+        return self._upsert_pool
+    
+    def shutdown(self) -> None:
+        """Stop the upsert worker threads"""
+        if self._upsert_pool is not None:
+            self._upsert_pool.shutdown(wait=False, cancel_futures=True)
+            self._upsert_pool = None
     
     def _get_index(self):
-        """Get or create the Pinecone index"""
+        """
+        Get the shared Pinecone index handle
+        One handle (and its connection pool) serves every request; the lock keeps
+        concurrent first calls from racing to connect. The index itself is
+        expected to exist (see ensure_index, run once at startup)
+        """
         if self._index is None:
-            # Check if index exists
-            existing_indexes = [idx.name for idx in self.pc.list_indexes()]
-            
-            if self.index_name not in existing_indexes:
-                logger.info(f"Creating Pinecone index: {self.index_name}")
-                self.pc.create_index(
-                    name=self.index_name,
-                    dimension=settings.embedding_dimension,
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud="aws",
-                        region=settings.pinecone_environment
-                    )
-                )
-            
-            self._index = self.pc.Index(self.index_name)
-            logger.info(f"Connected to Pinecone index: {self.index_name}")
+            with _index_lock:
+                if self._index is None:
+                    self._index = self.pc.Index(self.index_name)
+                    logger.info(f"Connected to Pinecone index: {self.index_name}")
         
         return self._index
     
+    async def _get_index_async(self):
+        """Get the index handle without blocking the event loop on first connect"""
+        if self._index is None:
+            await asyncio.to_thread(self._get_index)
+        return self._index
+    
+    def ensure_index(self) -> None:
+        """
+        Create the index if it doesn't exist (blocking control-plane calls)
+        Called once at application startup, keeping the check off the request path
+        """
+        existing_indexes = {idx.name for idx in self.pc.list_indexes()}
+        
+        if self.index_name not in existing_indexes:
+            logger.info(f"Creating Pinecone index: {self.index_name}")
+            self.pc.create_index(
+                name=self.index_name,
+                dimension=settings.embedding_dimension,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud="aws",
+                    region=settings.pinecone_environment
+                )
+            )
+    
     async def upsert_chunk_vector(
         self,
         doc_id: str,
@@ -55,7 +366,7 @@ class VectorStore:
         chunk_index: int,
         chunk_text: str,
         page_num: int,
-        embedding: List[float]
+        embedding: np.ndarray
     ) -> bool:
         """
         Store a text chunk embedding with metadata
@@ -66,39 +377,40 @@ class VectorStore:
             chunk_index: Index of the chunk in the document
             chunk_text: The actual text content of the chunk
             page_num: Page number where chunk starts
-            embedding: Vector embedding from FastEmbed
+            embedding: (dimension,) vector embedding from FastEmbed
         
         Returns:
             Success status
         """
         try:
-            index = self._get_index()
+            index = await self._get_index_async()
             
             # Create unique vector ID
             vector_id = f"{doc_id}_chunk_{chunk_index}"
             
             # Metadata for retrieval and display
             # Note: Pinecone has metadata size limits, truncate text if needed
-            truncated_text = chunk_text[:1000] if len(chunk_text) > 1000 else chunk_text
+            truncated_text = chunk_text[:1000]
             
             metadata = {
                 "doc_id": doc_id,
                 "doc_name": doc_name,
                 "chunk_index": chunk_index,
-                "chunk_text": truncated_text,
+                "chunk_text": _pack_chunk_text(truncated_text),
                 "page_num": page_num,
-                "indexed_at": datetime.utcnow().isoformat(),
                 "content_type": "text_chunk"
             }
             
-            # Upsert to Pinecone
-            index.upsert(
+            # Upsert to Pinecone (the client is synchronous, so off the event loop)
+            await asyncio.to_thread(
+                index.upsert,
                 vectors=[{
                     "id": vector_id,
-                    "values": embedding,
+                    "values": embedding.tolist(),
                     "metadata": metadata
                 }]
             )
+            self.query_cache.clear()
             
             logger.debug(f"Stored vector for {vector_id}")
             return True
@@ -111,7 +423,10 @@ class VectorStore:
         self,
         doc_id: str,
         doc_name: str,
-        chunk_data: List[tuple]  # List of (chunk_index, chunk_text, page_num, embedding)
+        chunk_indices: np.ndarray,
+        chunk_texts: List[str],
+        page_nums: np.ndarray,
+        embeddings: np.ndarray
     ) -> bool:
         """
         Store multiple chunk embeddings in batch
@@ -120,39 +435,61 @@ class VectorStore:
         Args:
             doc_id: Unique document identifier
             doc_name: Original document name
-            chunk_data: List of (chunk_index, chunk_text, page_num, embedding) tuples
+            chunk_indices: Chunk index per chunk
+            chunk_texts: Text content per chunk
+            page_nums: Starting page number per chunk
+            embeddings: (n_chunks, dimension) array from FastEmbed
         """
         try:
-            index = self._get_index()
+            index = await self._get_index_async()
+            
+            # Index arrays are converted to native Python values once, in bulk; embeddings
+            # stay in the array until their batch is sent
+            # Document-level fields are shared by every chunk's metadata
+            base_meta = {
+                "doc_id": doc_id,
+                "doc_name": doc_name,
+                "content_type": "text_chunk"
+            }
             
             vectors = []
-            for chunk_index, chunk_text, page_num, embedding in chunk_data:
-                vector_id = f"{doc_id}_chunk_{chunk_index}"
+            sizes = []
+            base_size = embeddings.shape[1] * UPSERT_BYTES_PER_VALUE + UPSERT_METADATA_OVERHEAD
+            id_prefix = f"{doc_id}_chunk_"
+            for chunk_index, chunk_text, page_num in zip(
+                chunk_indices.tolist(), chunk_texts, page_nums.tolist()
+            ):
+                vector_id = id_prefix + str(chunk_index)
                 
-                # Truncate text for metadata storage
-                truncated_text = chunk_text[:1000] if len(chunk_text) > 1000 else chunk_text
+                # Truncate text for metadata storage (a no-op slice returns the same string)
+                stored_text = _pack_chunk_text(chunk_text[:1000])
                 
-                metadata = {
-                    "doc_id": doc_id,
-                    "doc_name": doc_name,
-                    "chunk_index": chunk_index,
-                    "chunk_text": truncated_text,
-                    "page_num": page_num,
-                    "indexed_at": datetime.utcnow().isoformat(),
-                    "content_type": "text_chunk"
-                }
+                metadata = base_meta.copy()
+                metadata["chunk_index"] = chunk_index
+                metadata["chunk_text"] = stored_text
+                metadata["page_num"] = page_num
                 vectors.append({
                     "id": vector_id,
-                    "values": embedding,
                     "metadata": metadata
                 })
+                sizes.append(base_size + len(stored_text.encode()))
             
-            # Upsert in batches of 100 (Pinecone limit)
-            batch_size = 100
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i + batch_size]
-                index.upsert(vectors=batch)
-                logger.info(f"Upserted batch {i//batch_size + 1}/{(len(vectors) + batch_size - 1)//batch_size}")
+            # Upsert in batches within Pinecone's count and size limits across the upsert thread pool
+            batches = [
+                (vectors[start:stop], embeddings[start:stop])
+                for start, stop in _pack_batches(sizes, UPSERT_BATCH_SIZE, UPSERT_MAX_BYTES)
+            ]
+            loop = asyncio.get_running_loop()
+            pool = self._get_upsert_pool()
+            try:
+                await asyncio.gather(*(
+                    loop.run_in_executor(pool, self._upsert_with_retry, index, batch, batch_embeddings)
+                    for batch, batch_embeddings in batches
+                ))
+            finally:
+                # Even a partial upsert changes search results
+                self.query_cache.clear()
+            logger.info(f"Upserted {len(batches)} batches")
             
             logger.info(f"Stored {len(vectors)} chunk vectors for document {doc_id}")
             return True
@@ -161,9 +498,83 @@ class VectorStore:
             logger.error(f"Error in batch upsert: {str(e)}")
             raise
     
+    def _upsert_with_retry(self, index, batch: List[dict], embeddings: np.ndarray) -> None:
+        """
+        Upsert one batch (blocking), retrying transient failures with
+        jittered exponential backoff
+        The batch's embedding rows become lists only here, at the network boundary
+        """
+        batch = [
+            dict(vector, values=values) for vector, values in zip(batch, embeddings.tolist())
+        ]
+        for attempt in range(UPSERT_MAX_RETRIES + 1):
+            try:
+                index.upsert(vectors=batch)
+                return
+            except Exception as e:
+                if attempt == UPSERT_MAX_RETRIES or not _is_retryable(e):
+                    raise
+                delay = UPSERT_BACKOFF_SECONDS * 2 ** attempt
+                delay += random.uniform(0, delay)
+                logger.warning(f"Upsert failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    async def _search(
+        self,
+        index,
+        query_embedding: np.ndarray,
+        top_k: int,
+        doc_ids: Optional[List[str]],
+        generation: int
+    ) -> List[Dict[str, Any]]:
+        """Query Pinecone for one embedding and cache the matches (if still current)"""
+        # Build filter if doc_ids specified
+        filter_dict = None
+        if doc_ids:
+            filter_dict = {"doc_id": {"$in": doc_ids}}
+        
+        # Query Pinecone
+        results = await asyncio.to_thread(
+            index.query,
+            vector=query_embedding.tolist(),
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter_dict
+        )
+        
+        matches = [_match_to_dict(match) for match in results.matches]
+        
+        self.query_cache.set(query_embedding, top_k, doc_ids, matches, generation)
+        return matches
+    
+    def _search_shared(
+        self,
+        index,
+        query_embedding: np.ndarray,
+        top_k: int,
+        doc_ids: Optional[List[str]]
+    ) -> "asyncio.Future[List[Dict[str, Any]]]":
+        """
+        Start a search, or join an identical one that is already in flight
+        (one started since the cache was last cleared, so it sees the current index).
+        Shielded so one caller's cancellation doesn't cancel it for the others
+        """
+        generation = self.query_cache.generation
+        key = QueryCache._make_key(
+            np.asarray(query_embedding, dtype=np.float32), top_k, doc_ids
+        ) + (generation,)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._search(index, query_embedding, top_k, doc_ids, generation)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return asyncio.shield(task)
+    
     async def similarity_search(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         top_k: int = 5,
         doc_ids: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
@@ -171,7 +582,7 @@ class VectorStore:
         Search for similar text chunks
         
         Args:
-            query_embedding: Query vector from FastEmbed
+            query_embedding: (dimension,) query vector from FastEmbed
             top_k: Number of results to return
             doc_ids: Optional filter by specific documents
         
@@ -179,33 +590,13 @@ class VectorStore:
             List of matching chunks with metadata and scores
         """
         try:
-            index = self._get_index()
-            
-            # Build filter if doc_ids specified
-            filter_dict = None
-            if doc_ids:
-                filter_dict = {"doc_id": {"$in": doc_ids}}
-            
-            # Query Pinecone
-            results = index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                filter=filter_dict
-            )
+            cached = self.query_cache.get(query_embedding, top_k, doc_ids)
+            if cached is not None:
+                logger.info(f"Found {len(cached)} similar chunks (cached)")
+                return cached
             
-            matches = []
-            for match in results.matches:
-                matches.append({
-                    "vector_id": match.id,
-                    "score": float(match.score),
-                    "doc_id": match.metadata.get("doc_id"),
-                    "doc_name": match.metadata.get("doc_name"),
-                    "chunk_index": match.metadata.get("chunk_index"),
-                    "chunk_text": match.metadata.get("chunk_text"),
-                    "page_num": match.metadata.get("page_num"),
-                    "indexed_at": match.metadata.get("indexed_at")
-                })
+            index = await self._get_index_async()
+            matches = await self._search_shared(index, query_embedding, top_k, doc_ids)
             
             logger.info(f"Found {len(matches)} similar chunks")
             return matches
@@ -222,12 +613,14 @@ class VectorStore:
             doc_id: Document identifier
         """
         try:
-            index = self._get_index()
+            index = await self._get_index_async()
             
             # Delete by metadata filter
-            index.delete(
+            await asyncio.to_thread(
+                index.delete,
                 filter={"doc_id": {"$eq": doc_id}}
             )
+            self.query_cache.clear()
             
             logger.info(f"Deleted vectors for document {doc_id}")
             return True
@@ -239,8 +632,8 @@ class VectorStore:
     async def get_index_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
         try:
-            index = self._get_index()
-            stats = index.describe_index_stats()
+            index = await self._get_index_async()
+            stats = await asyncio.to_thread(index.describe_index_stats)
             return {
                 "total_vectors": stats.total_vector_count,
                 "dimension": stats.dimension,
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Services read settings at import time; tests never reach the real APIs
+os.environ.setdefault("PINECONE_API_KEY", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,132 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from unittest import mock
+
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from services.embedding_service import embedding_service
+from services.pdf_service import LIST_CACHE_SETTLE_NS, PDFService
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the launcher as __main__ (as `python server.py` does) with uvicorn.run
+# replaced by a probe that lists the modules loaded in an extraction worker
+PROBE = """
+import json, runpy, sys
+import uvicorn
+
+def probe(*args, **kwargs):
+    import main  # what uvicorn imports for "main:create_app"
+    from services.pdf_service import pdf_service
+    pool = pdf_service._get_extract_pool()
+    modules = pool.submit(eval, "sorted(__import__('sys').modules)").result()
+    pdf_service.shutdown()
+    print(json.dumps(modules))
+
+uvicorn.run = probe
+runpy.run_path(sys.argv[1], run_name="__main__")
+"""
+
+
+def test_extract_workers_do_not_import_the_app():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, os.path.join(BACKEND_DIR, "server.py")],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120, check=True
+    )
+    modules = json.loads(result.stdout.splitlines()[-1])
+    assert "pdf_extract" in modules
+    loaded = {name.split(".")[0] for name in modules}
+    assert not loaded & {"main", "routes", "services", "onnxruntime", "pinecone"}
+
+
+def _add_document(upload_dir, doc_id):
+    (upload_dir / f"{doc_id}.pdf").write_bytes(b"%PDF-1.4")
+    (upload_dir / f"{doc_id}.meta").write_text(f"{doc_id}.pdf\n1")
+
+
+def test_listing_sees_an_upload_with_an_unchanged_directory_mtime(tmp_path):
+    service = PDFService()
+    service.upload_dir = tmp_path
+    _add_document(tmp_path, "a")
+    # A coarse clock can stamp the next upload with the same directory mtime
+    mtime = time.time_ns()
+    os.utime(tmp_path, ns=(mtime, mtime))
+    assert [doc["id"] for doc in service.list_documents()] == ["a"]
+
+    _add_document(tmp_path, "b")
+    os.utime(tmp_path, ns=(mtime, mtime))
+    assert sorted(doc["id"] for doc in service.list_documents()) == ["a", "b"]
+
+
+def test_listing_is_cached_once_the_directory_settles(tmp_path):
+    service = PDFService()
+    service.upload_dir = tmp_path
+    _add_document(tmp_path, "a")
+    mtime = time.time_ns() - 10 * LIST_CACHE_SETTLE_NS
+    os.utime(tmp_path, ns=(mtime, mtime))
+
+    listing = service.list_documents()
+    assert service.list_documents() is listing
+
+
+def _word_level_tokenizer(words):
+    tokenizer = Tokenizer(WordLevel({w: i for i, w in enumerate(["[UNK]", *words])}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    return tokenizer
+
+
+def _join_pages(page_texts):
+    """Join page texts the way PDFService.extract_text does"""
+    parts, boundaries, running_len = [], [], 0
+    for page_num, page_text in enumerate(page_texts):
+        boundaries.append((page_num + 1, running_len))
+        parts.append(page_text)
+        running_len += len(page_text)
+        if page_text and not page_text.endswith("\n"):
+            parts.append("\n")
+            running_len += 1
+    return "".join(parts), boundaries
+
+
+@pytest.mark.parametrize("chunk_size, overlap", [(1, 0), (5, 0), (7, 3), (16, 15), (40, 10)])
+def test_page_by_page_offsets_match_whole_text_encoding(chunk_size, overlap):
+    words = ["alpha", "beta", "café", "über", "x", "42", ",", "."]
+    tokenizer = _word_level_tokenizer(words)
+    service = PDFService()
+    service.chunk_size, service.chunk_overlap = chunk_size, overlap
+    rng = random.Random(chunk_size * 100 + overlap)
+
+    for _ in range(50):
+        page_texts = []
+        for _ in range(rng.randint(1, 12)):
+            layout = rng.random()
+            if layout < 0.2:
+                page_texts.append("")  # empty page
+            elif layout < 0.3:
+                page_texts.append(" \n ")  # no tokens
+            else:
+                lines = (
+                    " ".join(rng.choice(words + ["unknown"]) for _ in range(rng.randint(1, 8)))
+                    for _ in range(rng.randint(1, 4))
+                )
+                page_texts.append("\n".join(lines) + rng.choice(["", "\n", "  \n\n"]))
+        text, boundaries = _join_pages(page_texts)
+        expected = [tuple(offset) for offset in tokenizer.encode(text, add_special_tokens=False).offsets]
+
+        with mock.patch.object(embedding_service, "get_tokenizer", return_value=tokenizer):
+            offsets = service._token_offsets(text, boundaries)
+            assert len(offsets) == len(expected)
+            assert [offsets[i] for i in range(len(offsets))] == expected
+
+            # Chunk windows read a window's start and end as they advance, with
+            # pages behind them released; the chunks must match whole-text offsets
+            chunks = list(service._chunk_text_iter(text, boundaries))
+            with mock.patch.object(service, "_token_offsets", return_value=expected):
+                assert chunks == list(service._chunk_text_iter(text, boundaries))
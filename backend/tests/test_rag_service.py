@@ -0,0 +1,32 @@
+import sys
+import asyncio
+
+import services  # noqa: F401  (the package re-exports singletons under the module names)
+
+rag_service_module = sys.modules["services.rag_service"]
+
+
+def test_answer_racing_a_clear_is_not_cached():
+    service = rag_service_module.RAGService()
+
+    async def run_query(query, top_k, doc_ids):
+        # A document is deleted while the answer is being generated
+        service.clear_query_cache()
+        return {"answer": "cites the deleted document", "sources": []}, True
+
+    service._run_query = run_query
+    asyncio.run(service.process_query("question"))
+
+    assert not service._query_cache
+
+
+def test_answer_is_cached():
+    service = rag_service_module.RAGService()
+
+    async def run_query(query, top_k, doc_ids):
+        return {"answer": "answer", "sources": []}, True
+
+    service._run_query = run_query
+    result = asyncio.run(service.process_query("question"))
+
+    assert service._query_cache[("question", 5, ())] is result
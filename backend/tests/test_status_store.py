@@ -0,0 +1,21 @@
+import asyncio
+
+from models import DocumentStatus, ProcessingStatus
+from services.status_store import StatusStore
+
+
+def test_update_after_delete_stays_deleted():
+    store = StatusStore()  # in memory: REDIS_URL isn't set
+    status = ProcessingStatus(
+        doc_id="d", status=DocumentStatus.PROCESSING, progress=10, total_pages=1, message=""
+    )
+
+    async def run():
+        await store.set(status)
+        await store.update(status, DocumentStatus.EMBEDDING, 50, "Embedding...")
+        assert (await store.get("d")).progress == 50
+        await store.delete("d")
+        await store.update(status, DocumentStatus.READY, 100, "Done")
+        return await store.get("d")
+
+    assert asyncio.run(run()) is None
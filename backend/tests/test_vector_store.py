@@ -0,0 +1,57 @@
+import sys
+import asyncio
+from unittest import mock
+
+import numpy as np
+import pytest
+from pinecone.errors import ApiError, PineconeConnectionError, PineconeValueError
+
+import services  # noqa: F401  (the package re-exports singletons under the module names)
+
+vector_store_module = sys.modules["services.vector_store"]
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ApiError("rate limited", 429), True),
+    (ApiError("unavailable", 503), True),
+    (ApiError("bad request", 400), False),
+    (PineconeConnectionError("reset"), True),
+    (TimeoutError(), True),
+    (PineconeValueError("dimension mismatch"), False),
+])
+def test_is_retryable(error, retryable):
+    assert vector_store_module._is_retryable(error) is retryable
+
+
+def test_value_error_is_not_retried():
+    index = mock.Mock()
+    index.upsert.side_effect = PineconeValueError("dimension mismatch")
+    store = vector_store_module.vector_store
+
+    with mock.patch.object(vector_store_module.time, "sleep") as sleep:
+        with pytest.raises(PineconeValueError):
+            store._upsert_with_retry(index, [{"id": "a", "metadata": {}}], np.zeros((1, 4)))
+
+    assert index.upsert.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_search_racing_a_clear_is_not_cached():
+    store = vector_store_module.VectorStore()
+    started = []
+
+    def query(**kwargs):
+        # The index changes while this search is in flight
+        started.append(store.query_cache.generation)
+        store.query_cache.clear()
+        return mock.Mock(matches=[])
+
+    index = mock.Mock()
+    index.query.side_effect = query
+    store._index = index
+    embedding = np.ones(store.query_cache._matrix.shape[1], dtype=np.float32)
+
+    asyncio.run(store.similarity_search(embedding))
+
+    assert store.query_cache.get(embedding, 5, None) is None
+    assert not store._inflight
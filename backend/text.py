@@ -1,8 +1,29 @@
+import asyncio
+from functools import lru_cache
+from cachetools import LRUCache
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 load_dotenv()
 
-model=ChatGoogleGenerativeAI(model="gemini-1.5-flash")
+# Responses to repeated prompts (lru_cache can't memoize coroutines)
+_responses: LRUCache = LRUCache(maxsize=256)
 
-res=model.invoke('Say HI')
-print(res)
\ No newline at end of file
+
+@lru_cache(maxsize=1)
+def get_model() -> ChatGoogleGenerativeAI:
+    return ChatGoogleGenerativeAI(model="gemini-1.5-flash")
+
+
+async def ask(prompt: str):
+    if prompt not in _responses:
+        _responses[prompt] = await get_model().ainvoke(prompt)
+    return _responses[prompt]
+
+
+async def main():
+    res = await ask('Say HI')
+    print(res)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -49,7 +49,7 @@ export interface ChatResponse {
 export interface PageImageResponse {
   doc_id: string;
   page_num: number;
-  image: string; // data:image/png;base64,...
+  image: string; // URL of the JPEG, usable directly as an <img> src
 }
 
 class ApiService {
@@ -152,16 +152,15 @@ class ApiService {
 
   /**
    * Get a specific page image
+   * The backend serves raw JPEGs with long-lived cache headers, so the URL is
+   * handed to the <img> directly and the browser cache does the rest
    */
   async getPageImage(docId: string, pageNum: number): Promise<PageImageResponse> {
-    const response = await fetch(`${this.baseUrl}/documents/${docId}/page/${pageNum}`);
-    
-    if (!response.ok) {
-      const error = await response.json();
-      throw new Error(error.detail || 'Failed to get page');
-    }
-
-    return response.json();
+    return {
+      doc_id: docId,
+      page_num: pageNum,
+      image: `${this.baseUrl}/documents/${docId}/page/${pageNum}`,
+    };
   }
 
   /**